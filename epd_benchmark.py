@@ -0,0 +1,200 @@
+"""Frames-per-second benchmark for the EPD status display refresh path.
+
+Loads the `epd` driver against the fake `epdconfig` unless --hardware is
+given and renders status frames in both orientations. It times the
+framebuffer conversion with the vectorized getbuffer and with the
+original per-pixel loop, checking that both give identical bytes. It
+then times three refresh paths: the original loop conversion with
+byte-at-a-time display, getbuffer with the bulk-transfer display, and
+getbuffer with the dirty-region partial refresh on a status screen
+whose counters and clock change between frames. With the fake,
+bus transactions per frame are counted and the emulated display RAM is
+checked against every frame sent.
+"""
+import argparse
+import importlib.machinery
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import time
+import types
+from PIL import Image, ImageDraw
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_driver(hardware=False):
+    """Import the extensionless `epd` module, with the fake epdconfig unless on hardware."""
+    if not hardware:
+        import fake_epdconfig
+        sys.modules['epdconfig'] = fake_epdconfig
+    loader = importlib.machinery.SourceFileLoader('epd', os.path.join(ROOT, 'epd'))
+    spec = importlib.util.spec_from_loader('epd', loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def legacy_getbuffer(self, image):
+    """The original per-pixel getbuffer, kept as the reference implementation."""
+    if self.width%8 == 0:
+        linewidth = int(self.width/8)
+    else:
+        linewidth = int(self.width/8) + 1
+
+    buf = [0xFF] * (linewidth * self.height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+
+    if(imwidth == self.width and imheight == self.height):
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    x = imwidth - x
+                    buf[int(x / 8) + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif(imwidth == self.height and imheight == self.width):
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = self.height - x - 1
+                if pixels[x, y] == 0:
+                    newy = imwidth - newy - 1
+                    buf[int(newx / 8) + newy*linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def legacy_display(self, image):
+    """The original display, one SPI transaction per byte."""
+    if self.width%8 == 0:
+        linewidth = int(self.width/8)
+    else:
+        linewidth = int(self.width/8) + 1
+
+    self.send_command(0x24)
+    for j in range(0, self.height):
+        for i in range(0, linewidth):
+            self.send_data(image[i + j * linewidth])
+    self.last_frame = bytes(image)
+    self.TurnOnDisplay()
+
+
+def status_frames(size, count, seed=0, ticking=False):
+    """Status screens like the ones the monitor shows: text, a rule and a price sparkline.
+
+    With `ticking`, only the counters in the header change between frames.
+    """
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        if ticking:
+            rng = random.Random(seed)
+        image = Image.new('1', size, 255)
+        draw = ImageDraw.Draw(image)
+        draw.text((2, 2), f"KOLs {rng.randint(10, 500)}  calls {rng.randint(100, 9999) + i}", fill=0)
+        draw.text((2, 14), f"alerts {rng.randint(0, 20)}  12:{i % 60:02d}", fill=0)
+        draw.line((0, 28, size[0], 28), fill=0)
+        top, bottom = 32, size[1] - 2
+        points = [(x, rng.randint(top, bottom)) for x in range(0, size[0], 4)]
+        draw.line(points, fill=0)
+        if i % 4 == 0 and not ticking:
+            # Dithered greyscale content exercises every bit pattern
+            band = (size[0], size[1] // 3)
+            image.paste(Image.effect_noise(band, 64).convert('1'), (0, size[1] - band[1]))
+        frames.append(image)
+    return frames
+
+
+def measure(func, frames, min_time):
+    """Run func over the frames until min_time has passed; returns frames per second."""
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for frame in frames:
+            func(frame)
+        done += len(frames)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EPD framebuffer conversion")
+    parser.add_argument('--frames', type=int, default=8, help="Distinct frames per orientation")
+    parser.add_argument('--min-time', type=float, default=2.0,
+                        help="Seconds to run each measurement for")
+    parser.add_argument('--hardware', action='store_true',
+                        help="Use the real epdconfig and drive the attached panel")
+    parser.add_argument('--json', help="Write the results to this file")
+    args = parser.parse_args()
+
+    driver = load_driver(args.hardware)
+    epd = driver.EPD()
+    epd.init()
+    legacy = types.MethodType(legacy_getbuffer, epd)
+    legacy_refresh = types.MethodType(legacy_display, epd)
+    bus = None if args.hardware else sys.modules['epdconfig']
+
+    def refresh_paths(frames, ticking):
+        yield 'loop', lambda frame: legacy_refresh(legacy(frame))
+        yield 'bulk', lambda frame: epd.display(epd.getbuffer(frame))
+        # Start the dirty path from the first frame so later ones are diffs
+        epd.display(epd.getbuffer(ticking[0]))
+        yield 'dirty', lambda frame: epd.displayPartialDirty(epd.getbuffer(frame))
+
+    def check_ram(frame):
+        expected = epd.getbuffer(frame)
+        if bus.ram_frame(len(expected) // epd.height, epd.height) != expected:
+            raise SystemExit("Display RAM does not match the frame sent")
+
+    results = []
+    for orientation, size in (('vertical', (epd.width, epd.height)),
+                              ('horizontal', (epd.height, epd.width))):
+        frames = status_frames(size, args.frames)
+        for frame in frames:
+            if epd.getbuffer(frame) != bytes(legacy(frame)):
+                raise SystemExit(f"getbuffer output differs from the loop version ({orientation})")
+
+        result = {'orientation': orientation}
+        for name, getbuffer in (('loop', legacy), ('numpy', epd.getbuffer)):
+            result[f'{name}_getbuffer_fps'] = measure(getbuffer, frames, args.min_time)
+        result['getbuffer_speedup'] = result['numpy_getbuffer_fps'] / result['loop_getbuffer_fps']
+
+        ticking = status_frames(size, args.frames, ticking=True)
+        for name, refresh in refresh_paths(frames, ticking):
+            sequence = ticking if name == 'dirty' else frames
+            if bus is not None:
+                bus.reset_stats()
+                for frame in sequence:
+                    refresh(frame)
+                    check_ram(frame)
+                result[f'{name}_transactions_per_frame'] = bus.stats['transactions'] / len(sequence)
+            result[f'{name}_refresh_fps'] = measure(refresh, sequence, args.min_time)
+        results.append(result)
+
+        logger.info(
+            f"{orientation}: getbuffer {result['loop_getbuffer_fps']:.1f} -> "
+            f"{result['numpy_getbuffer_fps']:.1f} fps ({result['getbuffer_speedup']:.1f}x)"
+        )
+        for name in ('loop', 'bulk', 'dirty'):
+            transactions = result.get(f'{name}_transactions_per_frame')
+            logger.info(
+                f"  {name} refresh: {result[f'{name}_refresh_fps']:.1f} fps"
+                + (f", {transactions:.0f} bus transactions per frame" if transactions is not None else "")
+            )
+
+    if args.hardware:
+        epd.sleep()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
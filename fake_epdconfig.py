@@ -0,0 +1,134 @@
+"""Stand-in for the Waveshare `epdconfig` hardware module.
+
+Provides the pin constants and bus functions the `epd` driver uses, with
+no hardware behind them, so the driver can run and be benchmarked off
+the Raspberry Pi. Install it before loading the driver:
+
+    import sys, fake_epdconfig
+    sys.modules['epdconfig'] = fake_epdconfig
+
+Every SPI transfer is counted in `stats`, and the controller's RAM
+window, address counter and black/white RAM (commands 0x11, 0x44, 0x45,
+0x4E, 0x4F, 0x24 and 0x26) are emulated, so tests can check both how
+much bus traffic a refresh costs and what ends up in display RAM.
+"""
+import numpy as np
+
+RST_PIN = 17
+DC_PIN = 25
+CS_PIN = 8
+BUSY_PIN = 24
+
+# Controller RAM size: 22 bytes (176 pixels) by 296 lines
+RAM_X_BYTES = 22
+RAM_Y_LINES = 296
+
+stats = {}
+commands = []
+ram = {}
+_state = {}
+
+
+def reset_stats():
+    """Clear the transaction counters, keeping the controller state."""
+    stats.update(transactions=0, bytes=0, commands=0, pin_writes=0)
+    commands.clear()
+
+
+def reset():
+    """Clear the counters and the emulated controller state."""
+    reset_stats()
+    ram[0x24] = np.full((RAM_Y_LINES, RAM_X_BYTES), 0xFF, dtype=np.uint8)
+    ram[0x26] = np.full((RAM_Y_LINES, RAM_X_BYTES), 0xFF, dtype=np.uint8)
+    _state.update(dc=0, command=None, args=[], entry_mode=0x03,
+                  x_start=0, x_end=RAM_X_BYTES - 1, y_start=0, y_end=RAM_Y_LINES - 1, x=0, y=0)
+
+
+def ram_frame(linewidth, height, command=0x24):
+    """RAM contents in getbuffer order, for the window the driver's init() sets.
+
+    The driver writes buffer row j to RAM line height - 1 - j.
+    """
+    return ram[command][height - 1::-1, :linewidth].tobytes()
+
+
+def _advance():
+    # X-first addressing: step along the line, then move to the next line
+    if _state['x'] == _state['x_end']:
+        _state['x'] = _state['x_start']
+        if _state['y'] == _state['y_end']:
+            _state['y'] = _state['y_start']
+        else:
+            _state['y'] += 1 if _state['entry_mode'] & 0x02 else -1
+    else:
+        _state['x'] += 1 if _state['entry_mode'] & 0x01 else -1
+
+
+def _data(byte):
+    command = _state['command']
+    if command in ram:
+        ram[command][_state['y'] % RAM_Y_LINES, _state['x'] % RAM_X_BYTES] = byte
+        _advance()
+        return
+
+    args = _state['args']
+    args.append(byte)
+    if command == 0x11:
+        _state['entry_mode'] = args[0]
+    elif command == 0x44 and len(args) == 2:
+        _state['x_start'], _state['x_end'] = args
+    elif command == 0x45 and len(args) == 4:
+        _state['y_start'] = args[0] | args[1] << 8
+        _state['y_end'] = args[2] | args[3] << 8
+    elif command == 0x4E:
+        _state['x'] = args[0]
+    elif command == 0x4F and len(args) == 2:
+        _state['y'] = args[0] | args[1] << 8
+
+
+def _transfer(data):
+    data = bytes(data)
+    stats['transactions'] += 1
+    stats['bytes'] += len(data)
+    for byte in data:
+        if _state['dc']:
+            _data(byte)
+        else:
+            stats['commands'] += 1
+            commands.append(byte)
+            _state['command'] = byte
+            _state['args'] = []
+
+
+def digital_write(pin, value):
+    stats['pin_writes'] += 1
+    if pin == DC_PIN:
+        _state['dc'] = value
+
+
+def digital_read(pin):
+    # 0 means the panel is idle
+    return 0
+
+
+def delay_ms(delaytime):
+    pass
+
+
+def spi_writebyte(data):
+    _transfer(data)
+
+
+def spi_writebyte2(data):
+    _transfer(data)
+
+
+def module_init():
+    return 0
+
+
+def module_exit():
+    pass
+
+
+reset()
@@ -0,0 +1,196 @@
+import argparse
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import config
+import scoring
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PROJECTION = {
+    'kol_id': 1,
+    'timestamp': 1,
+    'initial_price': 1,
+    'risk_factors': 1,
+    'performance': 1,
+}
+
+_worker_snapshot = None
+
+
+def default_parameters():
+    """Parameter set describing the scoring rules currently in production."""
+    return {
+        'risk_weights': dict(config.RISK_FACTOR_WEIGHTS),
+        'scam_threshold': config.SCAM_DETECTION_THRESHOLD,
+        'scam_penalty': config.SCAM_TRUST_PENALTY,
+        'trust_rules': dict(scoring.DEFAULT_TRUST_RULES),
+    }
+
+
+def parameter_grid(base=None, **axes):
+    """Expand lists of candidate values into parameter sets.
+
+    Keys may address nested values with a dot, e.g.
+    `parameter_grid(**{'scam_threshold': [0.5, 0.7], 'risk_weights.new_token': [0.1, 0.2]})`.
+    """
+    base = base or default_parameters()
+    keys = list(axes)
+    grid = []
+    for values in itertools.product(*(axes[k] for k in keys)):
+        params = {k: dict(v) if isinstance(v, dict) else v for k, v in base.items()}
+        for key, value in zip(keys, values):
+            if '.' in key:
+                outer, inner = key.split('.', 1)
+                params[outer][inner] = value
+            else:
+                params[key] = value
+        grid.append(params)
+    return grid
+
+
+def load_snapshot(db, since=None, until=None, history_tier=None):
+    """Build a columnar snapshot of historical calls from the database.
+
+    `min_roi` uses the lowest price in the call's price history, from every
+    tier unless `history_tier` names one.
+    """
+    query = {}
+    if since or until:
+        query['timestamp'] = {}
+        if since:
+            query['timestamp']['$gte'] = since
+        if until:
+            query['timestamp']['$lt'] = until
+
+    factors = list(config.RISK_FACTOR_WEIGHTS)
+    call_ids, kol_ids, initial, roi, liquidity, risk = [], [], [], [], [], []
+    for call in db.token_calls.find(query, SNAPSHOT_PROJECTION):
+        performance = call.get('performance') or {}
+        call_risk = call.get('risk_factors') or {}
+        call_ids.append(call['_id'])
+        kol_ids.append(call.get('kol_id'))
+        initial.append(call.get('initial_price', 0) or 0)
+        roi.append(performance.get('roi', 0))
+        liquidity.append(performance.get('liquidity_change', 0))
+        risk.append([bool(call_risk.get(f, False)) for f in factors])
+
+    initial = np.asarray(initial, dtype=np.float64)
+    roi = np.asarray(roi, dtype=np.float64)
+    lows = db.price_history.lowest_prices(call_ids, history_tier)
+    low_price = np.array([lows.get(c, np.nan) for c in call_ids], dtype=np.float64)
+    min_roi = np.where(np.isnan(low_price), roi, scoring.calculate_roi(initial, low_price))
+
+    kol_codes, kol_index = pd.factorize(pd.Series(kol_ids, dtype=object))
+    return {
+        'kol_codes': kol_codes.astype(np.int64),
+        'kol_ids': np.asarray([str(k) for k in kol_index], dtype=str),
+        'risk_factors': np.asarray(risk, dtype=bool).reshape(-1, len(factors)),
+        'risk_factor_names': np.asarray(factors),
+        'roi': roi,
+        'min_roi': np.minimum(roi, min_roi),
+        'liquidity_change': np.asarray(liquidity, dtype=np.float64),
+    }
+
+
+def export_snapshot(snapshot, path):
+    """Write a snapshot to a compressed .npz file."""
+    np.savez_compressed(path, **snapshot)
+
+
+def read_snapshot(path):
+    """Load a snapshot written by export_snapshot."""
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def evaluate(snapshot, params, top_n=10):
+    """Re-score every call in a snapshot under one parameter set."""
+    weights = params['risk_weights']
+    names = list(snapshot['risk_factor_names'])
+    factors = snapshot['risk_factors'][:, [names.index(f) for f in weights]]
+
+    risk = scoring.calculate_risk_score(factors, weights)
+    flagged = risk > params['scam_threshold']
+    scam = ((snapshot['min_roi'] <= config.RUG_ROI_THRESHOLD) |
+            (snapshot['liquidity_change'] <= config.RUG_LIQUIDITY_THRESHOLD))
+
+    impact = scoring.calculate_trust_impact(
+        snapshot['roi'], snapshot['liquidity_change'], params['trust_rules']
+    ) + np.where(flagged, params['scam_penalty'], 0)
+    kols = len(snapshot['kol_ids'])
+    totals = np.bincount(snapshot['kol_codes'], weights=impact, minlength=kols)
+    trust = np.clip(scoring.BASE_TRUST_SCORE + totals, 0, 100)
+    ranking = np.lexsort((snapshot['kol_ids'], -trust))[:top_n]
+
+    true_positives = int((flagged & scam).sum())
+    return {
+        'params': params,
+        'calls': int(len(risk)),
+        'flagged': int(flagged.sum()),
+        'scams': int(scam.sum()),
+        'precision': true_positives / max(1, int(flagged.sum())),
+        'recall': true_positives / max(1, int(scam.sum())),
+        'top_kols': [(str(snapshot['kol_ids'][i]), float(trust[i])) for i in ranking],
+    }
+
+
+def _init_worker(snapshot):
+    global _worker_snapshot
+    _worker_snapshot = read_snapshot(snapshot) if isinstance(snapshot, str) else snapshot
+
+
+def _evaluate_in_worker(args):
+    params, top_n = args
+    return evaluate(_worker_snapshot, params, top_n)
+
+
+def sweep(snapshot, param_sets, workers=None, top_n=10):
+    """Evaluate parameter sets across a process pool.
+
+    `snapshot` may be a loaded snapshot or the path of an exported one; a
+    path lets each worker load it directly instead of receiving a pickle.
+    """
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(snapshot,)) as pool:
+        chunksize = max(1, len(param_sets) // (workers * 4))
+        return list(pool.map(_evaluate_in_worker,
+                             [(p, top_n) for p in param_sets], chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay historical calls under alternate scoring rules")
+    parser.add_argument('--snapshot', help="Exported .npz snapshot to replay instead of the database")
+    parser.add_argument('--export', help="Write a snapshot of the database to this path and exit")
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Only replay calls from this date")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--thresholds', type=float, nargs='+',
+                        default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    args = parser.parse_args()
+
+    if args.snapshot:
+        snapshot = args.snapshot
+    else:
+        from database import Database
+        snapshot = load_snapshot(Database(), since=args.since)
+        if args.export:
+            export_snapshot(snapshot, args.export)
+            return
+
+    results = sweep(snapshot, parameter_grid(scam_threshold=args.thresholds), args.workers)
+    for result in results:
+        logger.info(
+            f"threshold={result['params']['scam_threshold']}: "
+            f"precision {result['precision']:.3f}, recall {result['recall']:.3f}, "
+            f"flagged {result['flagged']}/{result['calls']}, top KOL {result['top_kols'][:1]}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
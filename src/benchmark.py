@@ -0,0 +1,415 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import numpy as np
+from pymongo import monitoring
+import config
+import metrics
+from fake_services import (FakeSolanaRPC, FakeJupiter, FakeTwitter, FakeOpenAI,
+                           FAKE_MINT, redirect_twitter_client)
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCIES = ('solana', 'jupiter', 'twitter', 'openai')
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts ERROR records logged by the code under test."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+# Collection methods that each cost one round trip, counted when running on mongomock
+_COLLECTION_OPERATIONS = (
+    'find', 'find_one', 'find_one_and_update', 'find_one_and_replace', 'find_one_and_delete',
+    'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one',
+    'delete_one', 'delete_many', 'bulk_write', 'distinct', 'count_documents', 'aggregate',
+)
+
+
+class _CommandCounter(monitoring.CommandListener):
+    """Counts every command the driver sends, keyed by collection and command."""
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    def started(self, event):
+        command = event.command_name
+        collection = event.command.get('collection' if command == 'getMore' else command)
+        self.counter[f"{collection}.{command}" if isinstance(collection, str) else command] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class _CollectionCounter:
+    """Counts mongomock collection operations, keyed by collection and method.
+
+    Covers every collection, so work done by helpers such as the tweet
+    archive and the co-mention index is counted too. Operations that
+    mongomock implements through other operations count once.
+    """
+
+    def __init__(self, counter):
+        import mongomock
+        self.counter = counter
+        self.cls = mongomock.collection.Collection
+        self.originals = {}
+        self._depth = threading.local()
+
+    def __enter__(self):
+        for name in _COLLECTION_OPERATIONS:
+            original = getattr(self.cls, name)
+            self.originals[name] = original
+
+            def counted(collection, *args, _name=name, _original=original, **kwargs):
+                depth = getattr(self._depth, 'value', 0)
+                if not depth:
+                    self.counter[f"{collection.name}.{_name}"] += 1
+                self._depth.value = depth + 1
+                try:
+                    return _original(collection, *args, **kwargs)
+                finally:
+                    self._depth.value = depth
+            setattr(self.cls, name, counted)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self.originals.items():
+            setattr(self.cls, name, original)
+
+
+def _summarize(durations, wall_time, errors):
+    durations = np.asarray(durations) * 1000
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]) if len(durations) else (0, 0, 0)
+    return {
+        'iterations': int(len(durations)),
+        'errors': errors,
+        'mean_ms': float(durations.mean()) if len(durations) else 0.0,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'throughput_per_s': len(durations) / wall_time if wall_time else 0.0,
+    }
+
+
+class Benchmark:
+    """End-to-end benchmark of the bot against local service stand-ins.
+
+    Starts a fake Solana RPC, Jupiter, Twitter and OpenAI server, points
+    config and the API clients at them, and uses mongomock unless a local
+    MongoDB URI is given. Faults for a single Solana endpoint are keyed
+    `solana[i]` and override the `solana` settings for that endpoint.
+    """
+
+    def __init__(self, latency_ms=None, rate_limits=None, error_rates=None,
+                 mongo_uri=None, kols=20, calls_per_kol=10, solana_endpoints=1, seed=0):
+        latency_ms = latency_ms or {}
+        rate_limits = rate_limits or {}
+        error_rates = error_rates or {}
+        options = {name: {'latency_ms': latency_ms.get(name, 0),
+                          'rate_limit': rate_limits.get(name),
+                          'error_rate': error_rates.get(name, 0.0),
+                          'seed': seed}
+                   for name in DEPENDENCIES}
+        self.solana_endpoints = []
+        for i in range(solana_endpoints):
+            endpoint = dict(options['solana'])
+            key = f"solana[{i}]"
+            if key in latency_ms:
+                endpoint['latency_ms'] = latency_ms[key]
+            if key in rate_limits:
+                endpoint['rate_limit'] = rate_limits[key]
+            if key in error_rates:
+                endpoint['error_rate'] = error_rates[key]
+            self.solana_endpoints.append(FakeSolanaRPC(**endpoint))
+        self.services = {
+            'solana': self.solana_endpoints[0],
+            'jupiter': FakeJupiter(**options['jupiter']),
+            'twitter': FakeTwitter(**options['twitter']),
+            'openai': FakeOpenAI(**options['openai']),
+        }
+        self.mongo_uri = mongo_uri
+        self.kols = kols
+        self.calls_per_kol = calls_per_kol
+        self.seed = seed
+        self.db_calls = Counter()
+        self._collection_counter = None
+        self.errors = _ErrorCounter()
+
+    def __enter__(self):
+        for service in self._all_services():
+            service.start()
+        config.SOLANA_RPC_URLS = [service.url for service in self.solana_endpoints]
+        config.JUPITER_API_URL = self.services['jupiter'].url
+        config.OPENAI_BASE_URL = self.services['openai'].url + '/v1'
+        config.OPENAI_API_KEY = config.OPENAI_API_KEY or 'benchmark'
+        config.TWITTER_BEARER_TOKEN = config.TWITTER_BEARER_TOKEN or 'benchmark'
+        for name in ('TWITTER_API_KEY', 'TWITTER_API_SECRET',
+                     'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_SECRET'):
+            setattr(config, name, getattr(config, name) or 'benchmark')
+        logging.getLogger().addHandler(self.errors)
+
+        self.db = self._make_database()
+        self._seed_database()
+        return self
+
+    def __exit__(self, *exc):
+        logging.getLogger().removeHandler(self.errors)
+        if self._collection_counter is not None:
+            self._collection_counter.__exit__(*exc)
+        for service in self._all_services():
+            service.stop()
+
+    def _all_services(self):
+        return self.solana_endpoints + [s for name, s in self.services.items() if name != 'solana']
+
+    def _make_database(self):
+        import database
+        if self.mongo_uri:
+            config.MONGODB_URI = self.mongo_uri
+            config.DB_NAME = 'unweighted_benchmark'
+            # Applies to clients created from here on
+            monitoring.register(_CommandCounter(self.db_calls))
+            db = database.Database()
+            db.client.drop_database(config.DB_NAME)
+            return database.Database()
+
+        import mongomock
+        real_client = database.MongoClient
+        database.MongoClient = mongomock.MongoClient
+        try:
+            db = database.Database()
+        finally:
+            database.MongoClient = real_client
+        self._collection_counter = _CollectionCounter(self.db_calls).__enter__()
+        return db
+
+    def _seed_database(self):
+        rng = random.Random(self.seed)
+        now = datetime.now()
+        for i in range(self.kols):
+            kol_id = self.db.add_kol({
+                'twitter_handle': f"kol{i}",
+                'date_added': now - timedelta(days=60),
+                'total_calls': self.calls_per_kol,
+                'successful_calls': rng.randint(0, self.calls_per_kol),
+                'scam_calls': 0,
+                'trust_score': rng.choice([20, 35, 60, 80, 95]),
+                'last_updated': now
+            })
+            for j in range(self.calls_per_kol):
+                self.db.add_token_call({
+                    'kol_id': kol_id,
+                    'contract_address': FAKE_MINT,
+                    'timestamp': now - timedelta(hours=rng.randint(1, 24 * 6)),
+                    'initial_price': 0.05,
+                    'initial_liquidity': 25000.0,
+                    'risk_score': 0.3,
+                    'status': 'monitoring'
+                })
+        self.db_calls.clear()
+
+    def _reset_counters(self):
+        self.db_calls.clear()
+        self.errors.count = 0
+        for service in self._all_services():
+            service.reset_counters()
+
+    def _dependency_report(self):
+        report = {name: {'calls': dict(service.calls),
+                         'total': sum(service.calls.values()),
+                         'throttled': service.throttled,
+                         'injected_errors': service.errors}
+                  for name, service in self.services.items()}
+        if len(self.solana_endpoints) > 1:
+            solana = report['solana']
+            solana['calls'] = dict(sum((Counter(s.calls) for s in self.solana_endpoints), Counter()))
+            solana['total'] = sum(solana['calls'].values())
+            solana['throttled'] = sum(s.throttled for s in self.solana_endpoints)
+            solana['injected_errors'] = sum(s.errors for s in self.solana_endpoints)
+            solana['per_endpoint'] = [sum(s.calls.values()) for s in self.solana_endpoints]
+            # Injected failures are answered before a route is counted, so compare attempts
+            attempts = [sum(s.calls.values()) + s.errors + s.throttled for s in self.solana_endpoints]
+            solana['attempts_per_endpoint'] = attempts
+            healthy = [i for i, s in enumerate(self.solana_endpoints)
+                       if not s.error_rate and s.rate_limit is None]
+            if healthy and len(healthy) < len(self.solana_endpoints) and sum(attempts):
+                solana['healthy_share'] = sum(attempts[i] for i in healthy) / sum(attempts)
+                solana['healthy_fraction'] = len(healthy) / len(self.solana_endpoints)
+        report['mongodb'] = {'calls': dict(self.db_calls), 'total': sum(self.db_calls.values())}
+        return report
+
+    def run_mentions(self, iterations=50, concurrency=1):
+        """Time CommandHandler.process_mention for a stream of analyze requests."""
+        from command_handler import CommandHandler
+        from openai_analyzer import OpenAIAnalyzer
+        from token_analyzer import TokenAnalyzer
+        from twitter_handler import TwitterHandler
+
+        twitter = TwitterHandler(self.db.tweet_archive)
+        redirect_twitter_client(twitter.client, self.services['twitter'])
+        handler = CommandHandler(twitter, TokenAnalyzer(), OpenAIAnalyzer(), self.db)
+        mentions = [SimpleNamespace(
+            id=str(i), text=f"@unweightedai analyze @kol{i % self.kols}",
+            user=SimpleNamespace(screen_name='benchmark')
+        ) for i in range(iterations)]
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            durations = []
+
+            async def one(tweet):
+                async with semaphore:
+                    start = time.perf_counter()
+                    await handler.process_mention(tweet)
+                    durations.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(t) for t in mentions))
+            return durations, time.perf_counter() - start
+
+        self._reset_counters()
+        durations, wall_time = asyncio.run(run())
+        return self._result('process_mention', durations, wall_time)
+
+    def run_cycles(self, iterations=5):
+        """Time main.run_cycle over the seeded watchlist."""
+        from kol_tracker import KOLTracker
+        from main import run_cycle
+        from scheduler import PollScheduler
+        from token_analyzer import TokenAnalyzer
+
+        kol_tracker = KOLTracker(self.db)
+        redirect_twitter_client(kol_tracker.twitter.client, self.services['twitter'])
+        token_analyzer = TokenAnalyzer()
+        scheduler = PollScheduler(self.db)
+        self._reset_counters()
+        durations = []
+        start = time.perf_counter()
+        for _ in range(iterations):
+            cycle_start = time.perf_counter()
+            run_cycle(self.db, kol_tracker, token_analyzer, scheduler)
+            durations.append(time.perf_counter() - cycle_start)
+        return self._result('main_cycle', durations, time.perf_counter() - start)
+
+    def _result(self, scenario, durations, wall_time):
+        result = _summarize(durations, wall_time, self.errors.count)
+        result['scenario'] = scenario
+        result['dependencies'] = self._dependency_report()
+        return result
+
+
+def _parse_mapping(values, cast):
+    """Parse repeated `dependency=value` options; `solana[i]=value` targets one endpoint."""
+    mapping = {}
+    for item in values or []:
+        name, value = item.split('=', 1)
+        if re.fullmatch(r'solana\[\d+\]', name) is None and name not in DEPENDENCIES:
+            raise argparse.ArgumentTypeError(f"Unknown dependency {name}")
+        mapping[name] = cast(value)
+    return mapping
+
+
+def _log_result(result):
+    logger.info(
+        f"{result['scenario']}: {result['iterations']} runs, {result['errors']} errors, "
+        f"p50 {result['p50_ms']:.1f}ms p95 {result['p95_ms']:.1f}ms p99 {result['p99_ms']:.1f}ms, "
+        f"{result['throughput_per_s']:.2f}/s"
+    )
+    for name, stats in result['dependencies'].items():
+        extra = ''
+        if 'throttled' in stats:
+            extra = f" ({stats['throttled']} throttled, {stats['injected_errors']} injected errors)"
+        logger.info(f"  {name}: {stats['total']} calls{extra} {stats['calls']}")
+        if 'attempts_per_endpoint' in stats:
+            share = stats.get('healthy_share')
+            logger.info(f"    attempts per endpoint {stats['attempts_per_endpoint']}"
+                        + (f", {share:.0%} to healthy endpoints" if share is not None else ""))
+
+
+def _failover_failures(results):
+    """Scenarios where healthy endpoints took no more than an even share of RPC traffic."""
+    return [
+        result['scenario'] for result in results
+        if result['dependencies']['solana'].get('healthy_share') is not None and
+        result['dependencies']['solana']['healthy_share'] <= result['dependencies']['solana']['healthy_fraction']
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument('--scenario', choices=['mention', 'cycle', 'all'], default='all')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency', action='append', metavar='DEP=MS',
+                        help="Added latency per dependency, e.g. solana=40")
+    parser.add_argument('--rate-limit', action='append', metavar='DEP=RPS',
+                        help="Requests per second before a dependency answers 429")
+    parser.add_argument('--error-rate', action='append', metavar='DEP=P',
+                        help="Fraction of requests a dependency fails with 503; "
+                             "solana[i]=P targets one Solana endpoint")
+    parser.add_argument('--mongo-uri', help="Local MongoDB to use instead of mongomock")
+    parser.add_argument('--kols', type=int, default=20)
+    parser.add_argument('--solana-endpoints', type=int, default=1,
+                        help="Number of fake Solana RPC servers to pool across")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Enable the instrumentation layer and log its summary")
+    parser.add_argument('--allow-errors', action='store_true',
+                        help="Do not fail when a scenario logs errors without injected faults")
+    args = parser.parse_args()
+    metrics.REGISTRY.enabled = args.metrics
+
+    results = []
+    with Benchmark(latency_ms=_parse_mapping(args.latency, float),
+                   rate_limits=_parse_mapping(args.rate_limit, float),
+                   error_rates=_parse_mapping(args.error_rate, float),
+                   mongo_uri=args.mongo_uri, kols=args.kols,
+                   solana_endpoints=args.solana_endpoints) as bench:
+        if args.scenario in ('mention', 'all'):
+            results.append(bench.run_mentions(args.iterations, args.concurrency))
+        if args.scenario in ('cycle', 'all'):
+            results.append(bench.run_cycles(args.cycles))
+
+    for result in results:
+        _log_result(result)
+    if args.metrics:
+        for line in metrics.summary():
+            logger.info(line)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    # With a faulty endpoint in the pool, traffic has to move to the healthy ones
+    failover_failed = _failover_failures(results)
+    if failover_failed:
+        raise SystemExit(f"RPC traffic did not shift to healthy endpoints: {', '.join(failover_failed)}")
+
+    # Errors without injected faults mean the timings measure failure paths
+    if not (args.error_rate or args.rate_limit or args.allow_errors):
+        failed = [r['scenario'] for r in results if r['errors']]
+        if failed:
+            raise SystemExit(f"Scenarios logged errors without injected faults: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
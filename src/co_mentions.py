@@ -0,0 +1,150 @@
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _max_window(calls, window):
+    """Slide a time window over calls sorted by timestamp.
+
+    Returns (kol_ids, start, end) for the window holding the most distinct KOLs.
+    """
+    best = (set(), None, None)
+    in_window = Counter()
+    left = 0
+    for right, call in enumerate(calls):
+        in_window[call['kol_id']] += 1
+        while call['timestamp'] - calls[left]['timestamp'] > window:
+            in_window[calls[left]['kol_id']] -= 1
+            if not in_window[calls[left]['kol_id']]:
+                del in_window[calls[left]['kol_id']]
+            left += 1
+        if len(in_window) > len(best[0]):
+            best = (set(in_window), calls[left]['timestamp'], call['timestamp'])
+    return best
+
+
+class CoMentionIndex:
+    """Inverted index from mint to the time-ordered calls made on it.
+
+    Every recorded call is appended to its mint's document, links the
+    calling KOL to every other KOL that called the same mint inside the
+    coordination window (once per window: a KOL re-calling the mint does
+    not strengthen its links again), and raises a coordination alert as
+    soon as COORDINATION_MIN_KOLS distinct KOLs have called the mint
+    within it.
+    """
+
+    def __init__(self, db):
+        self.mints = db.mint_calls
+        self.edges = db.kol_edges
+        self.alerts = db.coordination_alerts
+        self.mints.create_index([('last_call', DESCENDING)])
+        self.edges.create_index([('kols', ASCENDING), ('count', DESCENDING)])
+        self.alerts.create_index([('mint', ASCENDING), ('window_start', ASCENDING)], unique=True)
+
+    def record(self, call_id, call_data, window_minutes=None, min_kols=None):
+        """Index a new call; returns the alert if it completes a coordinated push."""
+        window = timedelta(minutes=window_minutes or config.COORDINATION_WINDOW_MINUTES)
+        min_kols = min_kols or config.COORDINATION_MIN_KOLS
+        mint = call_data['contract_address']
+        kol_id = call_data['kol_id']
+        timestamp = call_data.get('timestamp') or datetime.now()
+
+        doc = self.mints.find_one_and_update(
+            {'_id': mint},
+            {
+                '$push': {'calls': {
+                    '$each': [{'kol_id': kol_id, 'call_id': call_id, 'timestamp': timestamp}],
+                    '$sort': {'timestamp': 1},
+                    '$slice': -config.COMENTION_MAX_CALLS_PER_MINT
+                }},
+                '$max': {'last_call': timestamp}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        nearby = [c for c in doc['calls'] if abs(c['timestamp'] - timestamp) <= window]
+        repeat = any(c['kol_id'] == kol_id and c['call_id'] != call_id and c['timestamp'] <= timestamp
+                     for c in nearby)
+        partners = set() if repeat else {c['kol_id'] for c in nearby} - {kol_id}
+        if partners:
+            self.edges.bulk_write([
+                UpdateOne(
+                    {'_id': self._edge_id(kol_id, other)},
+                    {
+                        '$inc': {'count': 1},
+                        '$set': {'last_mint': mint, 'last_seen': timestamp},
+                        '$setOnInsert': {'kols': sorted([kol_id, other], key=str)}
+                    },
+                    upsert=True
+                )
+                for other in partners
+            ], ordered=False)
+
+        recent = [c for c in nearby if timestamp - window <= c['timestamp'] <= timestamp]
+        kol_ids = {c['kol_id'] for c in recent}
+        if len(kol_ids) < min_kols:
+            return None
+        return self._raise_alert(mint, kol_ids, recent[0]['timestamp'], timestamp, window)
+
+    def _raise_alert(self, mint, kol_ids, start, end, window):
+        # Calls in one burst share an alert: reuse any alert whose window overlaps
+        existing = self.alerts.find_one(
+            {'mint': mint, 'window_end': {'$gte': start - window}},
+            sort=[('window_start', DESCENDING)]
+        )
+        window_start = existing['window_start'] if existing else start
+        alert = self.alerts.find_one_and_update(
+            {'mint': mint, 'window_start': window_start},
+            {
+                '$addToSet': {'kol_ids': {'$each': list(kol_ids)}},
+                '$max': {'window_end': end},
+                '$setOnInsert': {'created_at': datetime.now()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        logger.warning(
+            f"Coordinated calls on {mint}: {len(alert['kol_ids'])} KOLs "
+            f"between {alert['window_start']} and {alert['window_end']}"
+        )
+        return alert
+
+    @staticmethod
+    def _edge_id(a, b):
+        first, second = sorted([a, b], key=str)
+        return f"{first}|{second}"
+
+    def calls_for_mint(self, mint, since=None):
+        """Time-ordered calls on a mint."""
+        doc = self.mints.find_one({'_id': mint}) or {'calls': []}
+        if since is None:
+            return doc['calls']
+        return [c for c in doc['calls'] if c['timestamp'] >= since]
+
+    def coordinated_mints(self, min_kols=None, window_minutes=None, since=None):
+        """Mints called by at least `min_kols` distinct KOLs within `window_minutes`."""
+        window = timedelta(minutes=window_minutes or config.COORDINATION_WINDOW_MINUTES)
+        min_kols = min_kols or config.COORDINATION_MIN_KOLS
+        since = since or datetime.now() - timedelta(days=1)
+        results = []
+        for doc in self.mints.find({'last_call': {'$gte': since}}):
+            calls = [c for c in doc['calls'] if c['timestamp'] >= since]
+            kol_ids, start, end = _max_window(calls, window)
+            if len(kol_ids) >= min_kols:
+                results.append({'mint': doc['_id'], 'kol_ids': sorted(kol_ids, key=str),
+                                'window_start': start, 'window_end': end})
+        return sorted(results, key=lambda r: len(r['kol_ids']), reverse=True)
+
+    def co_callers(self, kol_id, limit=10):
+        """KOLs that most often call the same mints as `kol_id` within the window."""
+        return [
+            {'kol_id': next((k for k in edge['kols'] if k != kol_id), kol_id),
+             'count': edge['count'], 'last_mint': edge['last_mint'], 'last_seen': edge['last_seen']}
+            for edge in self.edges.find({'kols': kol_id}).sort('count', -1).limit(limit)
+        ]
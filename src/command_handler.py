@@ -7,6 +7,7 @@ from twitter_handler import TwitterHandler
 from token_analyzer import TokenAnalyzer
 from openai_analyzer import OpenAIAnalyzer
 from database import Database
+import scoring
 
 logger = logging.getLogger(__name__)
 
@@ -70,11 +71,9 @@ class CommandHandler:
         tweet_analysis = await self.openai.analyze_tweet_content(token_mentions)
         
         # AI Analysis of token patterns
-        token_pattern_analysis = await self.openai.analyze_token_pattern({
-            'tokens': token_analyses,
-            'mention_count': len(token_mentions),
-            'unique_tokens': len(set(m['token'] for m in token_analyses))
-        })
+        token_pattern_analysis = await self.openai.analyze_token_pattern(
+            self._summarize_tokens(token_analyses, len(token_mentions))
+        )
         
         # Get user metrics for AI evaluation
         user_metrics = await self.twitter.get_user_metrics(username)
@@ -90,7 +89,7 @@ class CommandHandler:
             'username': username,
             'metrics': {
                 'total_calls': len(token_analyses),
-                'unique_tokens': len(set(m['token'] for m in token_analyses))
+                'unique_tokens': len(set(t['mint_address'] for t in token_analyses))
             },
             'ai_analysis': {
                 'content_analysis': tweet_analysis,
@@ -100,12 +99,25 @@ class CommandHandler:
             'timestamp': datetime.now()
         }
 
+    def _summarize_tokens(self, token_analyses: List[Dict], mention_count: int) -> Dict:
+        """Collapse the analyzed tokens into the fields analyze_token_pattern reads."""
+        count = max(1, len(token_analyses))
+        return {
+            'tokens': token_analyses,
+            'mention_count': mention_count,
+            'unique_tokens': len(set(t['mint_address'] for t in token_analyses)),
+            'liquidity': sum(t['liquidity'] for t in token_analyses) / count,
+            'holder_count': sum(t['holder_count'] for t in token_analyses) / count,
+            'age_days': min((t['age_days'] for t in token_analyses), default=0)
+        }
+
     def _calculate_success_rate(self, token_analyses: List[Dict]) -> float:
         """Calculate success rate from token analyses."""
         if not token_analyses:
             return 0.0
-        successful = len([t for t in token_analyses if t.get('performance', 0) > 0])
-        return successful / len(token_analyses)
+        rates = scoring.success_rates([0] * len(token_analyses),
+                                      [t.get('performance', 0) for t in token_analyses])
+        return float(rates.iloc[0])
 
     def _format_response(self, analysis: Dict) -> str:
         """Format analysis results into a tweet-sized message."""
@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-from solana.rpc.async_api import AsyncClient
 
 load_dotenv()
 
@@ -21,9 +20,14 @@ TWITTER_ENGAGEMENT_THRESHOLD = 50  # Minimum engagement rate for consideration
 # Solana RPC URL
 SOLANA_RPC_URL = os.getenv('SOLANA_RPC_URL', 'https://api.mainnet-beta.solana.com')
 SOLANA_WS_URL = os.getenv('SOLANA_WS_URL', 'wss://api.mainnet-beta.solana.com')
+# Comma-separated list of RPC endpoints to balance across
+SOLANA_RPC_URLS = [url.strip() for url in os.getenv('SOLANA_RPC_URLS', SOLANA_RPC_URL).split(',') if url.strip()]
+RPC_POOL_INITIAL_CONCURRENCY = 4
+RPC_POOL_MAX_CONCURRENCY = 32
+RPC_POOL_MAX_ATTEMPTS = 3
 
 # Jupiter API for price data
-JUPITER_API_URL = 'https://price.jup.ag/v4'
+JUPITER_API_URL = os.getenv('JUPITER_API_URL', 'https://price.jup.ag/v4')
 
 # Database
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
@@ -31,6 +35,7 @@ DB_NAME = 'unweighted_ai'
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # None uses the public API
 OPENAI_MODEL = "gpt-4-turbo-preview"
 OPENAI_MAX_TOKENS = 500
 OPENAI_TEMPERATURE = 0.3
@@ -40,11 +45,74 @@ MIN_CREDIBILITY_SCORE = 0.7
 MIN_SUCCESS_RATE = 0.5
 HIGH_RISK_THRESHOLD = 0.7
 MEDIUM_RISK_THRESHOLD = 0.4
+SCAM_DETECTION_THRESHOLD = 0.7
+SCAM_TRUST_PENALTY = -10
+MIN_LIQUIDITY_SOL = 1000  # Liquidity reported by Jupiter below which a token is illiquid
+MIN_TOKEN_AGE_DAYS = 7  # Tokens younger than this count as new
+TOP_HOLDERS = 10  # Largest accounts whose combined share measures concentration
+HOLDER_CONCENTRATION_THRESHOLD = 0.5  # Share of supply in the top holders that counts as concentrated
+
+# Weight each risk factor adds to a token's 0-1 risk score
+RISK_FACTOR_WEIGHTS = {
+    'low_liquidity': 0.3,
+    'high_concentration': 0.3,
+    'suspicious_activity': 0.2,
+    'new_token': 0.2,
+}
+
+# Coordinated Shill Detection
+COORDINATION_WINDOW_MINUTES = 15
+COORDINATION_MIN_KOLS = 3  # Distinct KOLs calling one mint within the window
+COMENTION_MAX_CALLS_PER_MINT = 500  # Most recent calls kept per mint in the index
+
+# Price History
+# Seconds of samples per bucket in each tier; a bucket is packed once its span is over
+PRICE_HISTORY_BUCKET_SPANS = {
+    'raw': 86400,
+    '1h': 30 * 86400,
+    '1d': 365 * 86400,
+}
+# (tier, downsample interval in seconds, retention in days or None to keep forever)
+PRICE_HISTORY_TIERS = [
+    ('raw', 0, 7),
+    ('1h', 3600, 90),
+    ('1d', 86400, None),
+]
+PRICE_HISTORY_RETENTION_INTERVAL = 3600  # Seconds between retention passes
 
 # KOL Tracking
 WATCH_LIST_UPDATE_INTERVAL = 3600  # 1 hour
 PERFORMANCE_UPDATE_INTERVAL = 86400  # 24 hours
 
+# Call Polling
+POLL_MIN_INTERVAL = 60  # Fresh calls and volatile tokens
+POLL_MAX_INTERVAL = 21600  # 6 hours
+POLL_INTERVAL_DOUBLING_HOURS = 6  # Poll interval doubles with every 6 hours of call age
+POLL_VOLATILITY_SCALE = 5  # A 5% move between polls halves the interval
+POLL_MAX_AGE_DAYS = 7  # Calls older than this are settled
+
+# A call counts as rugged once its price or liquidity collapses (% change)
+RUG_ROI_THRESHOLD = -90
+RUG_LIQUIDITY_THRESHOLD = -80
+POLL_CONCURRENCY = 8
+POLL_MAX_PER_CYCLE = 500
+POLL_MAX_SLEEP = 300  # Longest the main loop sleeps between scheduler checks
+
+# Worker Sharding
+SHARD_PARTITIONS = 64  # KOL partitions distributed across workers; stored on each KOL
+SHARD_LEASE_TTL = 30  # Seconds a partition lease lasts without renewal
+SHARD_HEARTBEAT_INTERVAL = 10
+
+# Reactive Mode (change streams, requires a replica set)
+REACTIVE_MAX_AWAIT_MS = 1000  # Longest a change stream read blocks before the idle hook runs
+REACTIVE_RESUME_SAVE_INTERVAL = 5  # Seconds between resume token saves while events stream in
+
+# Metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+METRICS_LOG_INTERVAL = 300  # 5 minutes
+
 # Initialize Solana client
 async def get_solana_client():
-    return AsyncClient(SOLANA_RPC_URL)
+    from rpc_pool import RpcPool
+    return RpcPool(SOLANA_RPC_URLS)
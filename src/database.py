@@ -1,5 +1,11 @@
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import ASCENDING, MongoClient, UpdateOne
 import config
+import metrics
+from sharding import partition_of
+from price_history import PriceHistory
+from co_mentions import CoMentionIndex
+from tweet_archive import TweetArchive
 from datetime import datetime, timedelta
 #bang 
 class Database:
@@ -9,15 +15,44 @@ class Database:
         self.kols = self.db.kols
         self.token_calls = self.db.token_calls
         self.performance_history = self.db.performance_history
+        self.analysis_log = self.db.analysis_log
+        # The scheduler loads monitored calls by status, newest since a date
+        self.token_calls.create_index([('status', ASCENDING), ('timestamp', ASCENDING)])
+        # Sharded workers load the KOLs of the partitions they own
+        self.kols.create_index([('partition', ASCENDING)])
+        self.price_history = PriceHistory(self.performance_history)
+        self.co_mentions = CoMentionIndex(self.db)
+        self.tweet_archive = TweetArchive(self.db)
 
+    @metrics.timed('mongo.add_kol')
     def add_kol(self, kol_data):
-        """Add a new KOL to the database."""
+        """Add a new KOL to the database, tagged with its shard partition."""
+        kol_data.setdefault('_id', ObjectId())
+        kol_data['partition'] = partition_of(kol_data['_id'])
         return self.kols.insert_one(kol_data).inserted_id
 
+    @metrics.timed('mongo.assign_kol_partitions')
+    def assign_kol_partitions(self):
+        """Tag KOLs stored without a shard partition; returns how many were tagged."""
+        operations = [
+            UpdateOne({'_id': kol['_id']}, {'$set': {'partition': partition_of(kol['_id'])}})
+            for kol in self.kols.find({'partition': {'$exists': False}}, {'_id': 1})
+        ]
+        if operations:
+            self.kols.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @metrics.timed('mongo.get_kols_in_partitions')
+    def get_kols_in_partitions(self, partitions):
+        """Every KOL in the given shard partitions."""
+        return list(self.kols.find({'partition': {'$in': list(partitions)}}))
+
+    @metrics.timed('mongo.get_kol')
     def get_kol(self, kol_id):
         """Retrieve KOL information."""
         return self.kols.find_one({'_id': kol_id})
 
+    @metrics.timed('mongo.update_kol_trust_score')
     def update_kol_trust_score(self, kol_id, new_score):
         """Update a KOL's trust score."""
         self.kols.update_one(
@@ -25,10 +60,15 @@ class Database:
             {'$set': {'trust_score': new_score, 'last_updated': datetime.now()}}
         )
 
+    @metrics.timed('mongo.add_token_call')
     def add_token_call(self, call_data):
-        """Record a new token call."""
-        return self.token_calls.insert_one(call_data).inserted_id
+        """Record a new token call and index it for coordination checks."""
+        call_id = self.token_calls.insert_one(call_data).inserted_id
+        if call_data.get('contract_address') and call_data.get('kol_id') is not None:
+            self.co_mentions.record(call_id, call_data)
+        return call_id
 
+    @metrics.timed('mongo.get_recent_calls')
     def get_recent_calls(self, kol_id, days=30):
         """Get recent token calls for a KOL."""
         cutoff_date = datetime.now() - timedelta(days=days)
@@ -37,22 +77,77 @@ class Database:
             'timestamp': {'$gte': cutoff_date}
         }).sort('timestamp', -1))
 
+    @metrics.timed('mongo.get_called_mints')
+    def get_called_mints(self, kol_id, mints):
+        """The subset of `mints` a KOL already has recorded calls for."""
+        return set(self.token_calls.distinct(
+            'contract_address', {'kol_id': kol_id, 'contract_address': {'$in': mints}}
+        ))
+
+    @metrics.timed('mongo.update_call_performance')
     def update_call_performance(self, call_id, performance_data):
         """Update the performance metrics for a token call."""
+        now = datetime.now()
         self.token_calls.update_one(
             {'_id': call_id},
             {'$set': {
                 'performance': performance_data,
-                'last_updated': datetime.now()
+                'last_updated': now
+            }}
+        )
+        if 'current_price' in performance_data:
+            self.price_history.append(
+                call_id, now,
+                performance_data['current_price'],
+                performance_data.get('liquidity', float('nan'))
+            )
+
+    def get_monitoring_calls(self, since=None, projection=None):
+        """Get calls still being monitored, optionally only those made since a date."""
+        query = {'status': 'monitoring'}
+        if since is not None:
+            query['timestamp'] = {'$gte': since}
+        return metrics.timed_iter('mongo.get_monitoring_calls', self.token_calls.find(query, projection))
+
+    @metrics.timed('mongo.settle_call')
+    def settle_call(self, call_id, outcome):
+        """Stop monitoring a call and record how it ended."""
+        self.token_calls.update_one(
+            {'_id': call_id},
+            {'$set': {
+                'status': 'settled',
+                'outcome': outcome,
+                'settled_at': datetime.now()
             }}
         )
 
+    def get_all_calls(self, projection=None):
+        """Stream every token call, optionally restricted to a projection."""
+        return metrics.timed_iter('mongo.get_all_calls', self.token_calls.find({}, projection))
+
+    @metrics.timed('mongo.bulk_update_kol_stats')
+    def bulk_update_kol_stats(self, updates):
+        """Apply per-KOL field updates ({kol_id: {field: value}}) in one round trip."""
+        if not updates:
+            return
+        self.kols.bulk_write(
+            [UpdateOne({'_id': kol_id}, {'$set': fields}) for kol_id, fields in updates.items()],
+            ordered=False
+        )
+
+    @metrics.timed('mongo.log_analysis')
+    def log_analysis(self, log_entry):
+        """Record an on-demand KOL analysis."""
+        return self.analysis_log.insert_one(log_entry).inserted_id
+
+    @metrics.timed('mongo.get_top_kols')
     def get_top_kols(self, limit=10):
         """Get top performing KOLs."""
         return list(self.kols.find({
             'total_calls': {'$gt': 5}  # Minimum calls for ranking
         }).sort('trust_score', -1).limit(limit))
 
+    @metrics.timed('mongo.get_suspicious_kols')
     def get_suspicious_kols(self, threshold=40):
         """Get KOLs with low trust scores."""
         return list(self.kols.find({
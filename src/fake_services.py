@@ -0,0 +1,322 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+
+# A valid base58 signature (64 bytes) and mint for canned responses
+FAKE_SIGNATURE = '5' + '1' * 87
+FAKE_MINT = 'So11111111111111111111111111111111111111112'
+FAKE_HOLDER_BALANCE = 1_000_000_000  # Raw token units held by each fake holder
+
+_BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def fake_mint(n):
+    """A deterministic, valid base58 mint address distinct for every n."""
+    data = hashlib.sha256(f"fake-mint-{n}".encode()).digest()
+    value = int.from_bytes(data, 'big')
+    encoded = ''
+    while value:
+        value, digit = divmod(value, 58)
+        encoded = _BASE58_ALPHABET[digit] + encoded
+    return '1' * (len(data) - len(data.lstrip(b'\0'))) + encoded
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle and
+    # delayed ACKs add ~40ms to every keep-alive request.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.service.dispatch(self, 'GET')
+
+    def do_POST(self):
+        self.server.service.dispatch(self, 'POST')
+
+
+class FakeService:
+    """Local HTTP stand-in for an external API.
+
+    Runs a threaded server on an ephemeral port with configurable latency,
+    a token-bucket rate limit answered with 429, and random 503 injection.
+    """
+
+    name = 'service'
+
+    def __init__(self, latency_ms=0, jitter_ms=0, rate_limit=None, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit  # Requests per second, None for unlimited
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.throttled = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0
+        self._refilled = time.monotonic()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.throttled = 0
+            self.errors = 0
+
+    def _take_token(self):
+        if self.rate_limit is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def dispatch(self, request, method):
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+        parsed = urlparse(request.path)
+
+        if not self._take_token():
+            self._send(request, 429, {'error': 'rate limited'},
+                       {'x-rate-limit-reset': str(int(time.time()) + 1), 'Retry-After': '1'})
+            return
+
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            self._send(request, 503, {'error': 'injected failure'})
+            return
+
+        try:
+            payload = json.loads(body) if body else None
+            route, status, response = self.handle(method, parsed.path, parse_qs(parsed.query), payload)
+        except Exception as e:
+            route, status, response = 'error', 500, {'error': str(e)}
+        with self._lock:
+            self.calls[route] += 1
+        self._send(request, status, response)
+
+    def handle(self, method, path, query, payload):
+        """Return (route label, status code, JSON body) for a request."""
+        raise NotImplementedError
+
+    def _send(self, request, status, body, headers=None):
+        data = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+
+class FakeSolanaRPC(FakeService):
+    """Solana JSON-RPC endpoint answering the methods TokenAnalyzer uses."""
+
+    name = 'solana'
+
+    def __init__(self, token_age_days=30, holders=250, **kwargs):
+        super().__init__(**kwargs)
+        self.token_age_days = token_age_days
+        self.holders = holders
+
+    @staticmethod
+    def _amount(raw, decimals=6):
+        ui = raw / 10 ** decimals
+        return {'amount': str(raw), 'decimals': decimals, 'uiAmount': ui, 'uiAmountString': str(ui)}
+
+    def _result(self, method, params):
+        context = {'slot': 1}
+        if method == 'getAccountInfo':
+            return {'context': context, 'value': {
+                'data': ['', 'base64'], 'executable': False, 'lamports': 1461600,
+                'owner': 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA', 'rentEpoch': 0
+            }}
+        if method == 'getSignaturesForAddress':
+            block_time = int((datetime.now() - timedelta(days=self.token_age_days)).timestamp())
+            limit = (params[1] or {}).get('limit', 1) if len(params) > 1 else 1
+            return [{
+                'signature': FAKE_SIGNATURE, 'slot': 1, 'err': None, 'memo': None,
+                'blockTime': block_time, 'confirmationStatus': 'finalized'
+            }] * min(limit, 100)
+        if method == 'getTokenLargestAccounts':
+            # Supply split evenly between the holders; the RPC returns at most 20
+            return {'context': context, 'value': [
+                dict(self._amount(FAKE_HOLDER_BALANCE), address=fake_mint(i))
+                for i in range(min(20, self.holders))
+            ]}
+        if method == 'getTokenSupply':
+            return {'context': context, 'value': self._amount(FAKE_HOLDER_BALANCE * self.holders)}
+        if method == 'getHealth':
+            return 'ok'
+        raise ValueError(f"Unsupported method {method}")
+
+    def handle(self, method, path, query, payload):
+        batch = payload if isinstance(payload, list) else [payload]
+        responses = []
+        for call in batch:
+            try:
+                responses.append({'jsonrpc': '2.0', 'id': call.get('id'),
+                                  'result': self._result(call['method'], call.get('params') or [])})
+            except ValueError as e:
+                responses.append({'jsonrpc': '2.0', 'id': call.get('id'),
+                                  'error': {'code': -32601, 'message': str(e)}})
+        label = batch[0]['method'] if len(batch) == 1 else 'batch'
+        return label, 200, responses if isinstance(payload, list) else responses[0]
+
+
+class FakeJupiter(FakeService):
+    """Jupiter v4 price endpoint."""
+
+    name = 'jupiter'
+
+    def __init__(self, price=0.05, liquidity=25000.0, **kwargs):
+        super().__init__(**kwargs)
+        self.price = price
+        self.liquidity = liquidity
+
+    def handle(self, method, path, query, payload):
+        ids = query.get('ids', [''])[0].split(',')
+        return 'price', 200, {'data': {
+            mint: {'id': mint, 'price': self.price, 'liquidityUsd': self.liquidity} for mint in ids
+        }}
+
+
+class FakeTwitter(FakeService):
+    """Twitter API v2 subset: user lookup, user timeline and tweet creation.
+
+    The newest tweet of every timeline response calls a mint never seen
+    before, so each poll of a KOL finds exactly one new call.
+    """
+
+    name = 'twitter'
+
+    def __init__(self, tweets_per_user=20, followers=5000, **kwargs):
+        super().__init__(**kwargs)
+        self.tweets_per_user = tweets_per_user
+        self.followers = followers
+        self._next_id = 1000
+        self._mints = 0
+
+    def _user(self, username):
+        return {
+            'id': str(abs(hash(username)) % 10 ** 12), 'name': username, 'username': username,
+            'created_at': '2020-01-01T00:00:00.000Z', 'verified': False,
+            'description': '',
+            'public_metrics': {'followers_count': self.followers, 'following_count': 300,
+                               'tweet_count': 4200, 'listed_count': 10}
+        }
+
+    def _tweets(self, user_id):
+        now = datetime.utcnow()
+        with self._lock:
+            self._mints += 1
+            fresh = fake_mint(self._mints)
+        return [{
+            'id': f"{user_id}{i:04d}",
+            'text': f"New solana token launch {fresh if i == 0 else FAKE_MINT} #{i}",
+            'created_at': (now - timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'public_metrics': {'like_count': 40 + i, 'retweet_count': 5, 'reply_count': 3,
+                               'quote_count': 1}
+        } for i in range(self.tweets_per_user)]
+
+    def handle(self, method, path, query, payload):
+        parts = path.strip('/').split('/')
+        if method == 'GET' and parts[:3] == ['2', 'users', 'by'] and len(parts) == 5:
+            return 'get_user', 200, {'data': self._user(parts[4])}
+        if method == 'GET' and parts[:2] == ['2', 'users'] and parts[-1] == 'tweets':
+            return 'get_users_tweets', 200, {'data': self._tweets(parts[2])}
+        if method == 'POST' and parts == ['2', 'tweets']:
+            with self._lock:
+                self._next_id += 1
+                tweet_id = str(self._next_id)
+            return 'create_tweet', 201, {'data': {'id': tweet_id, 'text': payload.get('text', '')}}
+        return 'unknown', 404, {'errors': [{'message': f"No route for {method} {path}"}]}
+
+
+class FakeOpenAI(FakeService):
+    """OpenAI chat completions endpoint returning a fixed assessment."""
+
+    name = 'openai'
+
+    def __init__(self, reply="Risk level: Medium. No clear warning flags.", **kwargs):
+        super().__init__(**kwargs)
+        self.reply = reply
+
+    def handle(self, method, path, query, payload):
+        if not path.endswith('/chat/completions'):
+            return 'unknown', 404, {'error': {'message': f"No route for {path}"}}
+        return 'chat_completion', 200, {
+            'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': payload.get('model', 'fake'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': self.reply}}],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120}
+        }
+
+
+class RedirectAdapter(requests.adapters.HTTPAdapter):
+    """Requests adapter that rewrites a URL prefix, used to point tweepy at FakeTwitter."""
+
+    def __init__(self, prefix, target, **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self.target = target
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(self.prefix):
+            request.url = self.target + request.url[len(self.prefix):]
+        return super().send(request, **kwargs)
+
+
+def redirect_twitter_client(client, fake):
+    """Route a tweepy.Client's requests to a FakeTwitter server."""
+    prefix = 'https://api.twitter.com'
+    client.session.mount(prefix, RedirectAdapter(prefix, fake.url))
+    return client
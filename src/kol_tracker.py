@@ -1,10 +1,17 @@
+import asyncio
 import tweepy
 from datetime import datetime, timedelta
 import pandas as pd
+import config
 from database import Database
 from token_analyzer import TokenAnalyzer
+from twitter_handler import TwitterHandler
 #continue
 
+def trust_recommendation(trust_score):
+    """Recommendation band for a trust score."""
+    return 'Trusted' if trust_score > 70 else 'Caution' if trust_score > 40 else 'Untrusted'
+
 class KOLTracker:
     def __init__(self, db_connection):
         self.db = db_connection
@@ -12,6 +19,7 @@ class KOLTracker:
         self.auth = tweepy.OAuthHandler(config.TWITTER_API_KEY, config.TWITTER_API_SECRET)
         self.auth.set_access_token(config.TWITTER_ACCESS_TOKEN, config.TWITTER_ACCESS_SECRET)
         self.api = tweepy.API(self.auth)
+        self.twitter = TwitterHandler(db_connection.tweet_archive)
 
     def track_kol(self, twitter_handle):
         """Track a new KOL's activity."""
@@ -26,24 +34,55 @@ class KOLTracker:
         }
         self.db.add_kol(kol_data)
 
-    def analyze_token_call(self, kol_id, contract_address):
-        """Analyze a new token call from a KOL."""
-        token_data = self.token_analyzer.analyze_contract(contract_address)
+    def check_new_calls(self, kol_id):
+        """Token calls in a KOL's recent tweets that have not been recorded yet."""
+        kol = self.db.get_kol(kol_id)
+        mentions = asyncio.run(self.twitter.monitor_user_activity(kol['twitter_handle']))
+
+        first_seen = {}
+        for mention in sorted(mentions, key=lambda m: m['created_at']):
+            for token in mention['tokens']:
+                first_seen.setdefault(token, mention)
+        recorded = self.db.get_called_mints(kol_id, list(first_seen))
+
+        return [
+            {'contract_address': token, 'tweet_id': mention['tweet_id'],
+             'timestamp': mention['created_at']}
+            for token, mention in first_seen.items() if token not in recorded
+        ]
+
+    def analyze_token_call(self, kol_id, contract_address, called_at=None, tweet_id=None):
+        """Analyze a new token call from a KOL.
+
+        `called_at` is when the KOL tweeted the call; the call is stamped
+        with it, so calls discovered in the same pass keep their real
+        spacing. Without it the call is stamped with the discovery time.
+        """
+        now = datetime.now()
+        if called_at is not None and called_at.tzinfo is not None:
+            # Tweets carry aware UTC times; calls are stored in naive local time
+            called_at = called_at.astimezone().replace(tzinfo=None)
+        token_data = self.token_analyzer.run(self.token_analyzer.analyze_token(contract_address))
+        if token_data is None:
+            raise ValueError(f"Could not analyze token {contract_address}")
         
         call_data = {
             'kol_id': kol_id,
             'contract_address': contract_address,
-            'timestamp': datetime.now(),
+            'timestamp': called_at or now,
+            'discovered_at': now,
+            'tweet_id': tweet_id,
             'initial_price': token_data['price'],
             'initial_liquidity': token_data['liquidity'],
             'risk_score': token_data['risk_score'],
+            'risk_factors': token_data['risk_factors'],
             'status': 'monitoring'
         }
         
         self.db.add_token_call(call_data)
         
         if token_data['risk_score'] > config.SCAM_DETECTION_THRESHOLD:
-            self.update_kol_trust_score(kol_id, -10)
+            self.update_kol_trust_score(kol_id, config.SCAM_TRUST_PENALTY)
 
     def update_kol_trust_score(self, kol_id, change):
         """Update KOL's trust score based on their performance."""
@@ -61,5 +100,5 @@ class KOLTracker:
             'trust_score': kol['trust_score'],
             'success_rate': kol['successful_calls'] / max(1, kol['total_calls']),
             'recent_calls': recent_calls,
-            'recommendation': 'Trusted' if kol['trust_score'] > 70 else 'Caution' if kol['trust_score'] > 40 else 'Untrusted'
+            'recommendation': trust_recommendation(kol['trust_score'])
         }
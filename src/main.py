@@ -1,62 +1,227 @@
 from database import Database
 from kol_tracker import KOLTracker
 from token_analyzer import TokenAnalyzer
+from scheduler import PollScheduler
+from sharding import LeaseManager
+from reactive import ChangeStreamProcessor
+import argparse
+import multiprocessing
 import time
 import config
 import logging
+import metrics
 #Main
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
+def update_watchlist(db, kol_tracker, leases=None):
+    """Refresh KOL reports and record any new token calls.
+
+    With `leases`, the top and suspicious reports are limited to this
+    worker's KOLs, and every KOL in the partitions it owns is checked for
+    new calls, so adding workers widens the watchlist.
+    """
+    # Update KOL watchlist
+    logger.info("Updating KOL watchlist...")
+    top_kols = db.get_top_kols()
+    suspicious_kols = db.get_suspicious_kols()
+    watched = top_kols + suspicious_kols
+    if leases is not None:
+        top_kols = [kol for kol in top_kols if leases.owns_kol(kol['_id'])]
+        suspicious_kols = [kol for kol in suspicious_kols if leases.owns_kol(kol['_id'])]
+        watched = db.get_kols_in_partitions(leases.owned_partitions())
+
+    # Generate reports
+    logger.info("Generating KOL reports...")
+    for kol in top_kols:
+        report = kol_tracker.get_kol_report(kol['_id'])
+        logger.info(f"Top KOL {report['twitter_handle']}: Trust Score {report['trust_score']}")
+
+    for kol in suspicious_kols:
+        report = kol_tracker.get_kol_report(kol['_id'])
+        logger.info(f"Suspicious KOL {report['twitter_handle']}: Trust Score {report['trust_score']}")
+
+    # Monitor new token calls
+    logger.info(f"Monitoring {len(watched)} KOLs for new token calls...")
+    for kol in watched:
+        check_kol_calls(kol_tracker, kol)
+
+def check_kol_calls(kol_tracker, kol):
+    """Record and analyze any new token calls made by a KOL."""
+    try:
+        new_calls = kol_tracker.check_new_calls(kol['_id'])
+        for call in new_calls:
+            kol_tracker.analyze_token_call(kol['_id'], call['contract_address'],
+                                           call['timestamp'], call['tweet_id'])
+    except Exception as e:
+        logger.error(f"Error processing KOL {kol['twitter_handle']}: {str(e)}")
+
+def poll_calls(scheduler, token_analyzer):
+    """Update performance metrics for the monitored calls that are due."""
+    scheduler.sync()
+    polled = scheduler.run_due(token_analyzer)
+    if polled:
+        logger.info(f"Updated performance for {polled} calls ({len(scheduler)} monitored)")
+    return polled
+
+def enforce_retention(db):
+    """Drop price history buckets that have aged out of their tier."""
+    try:
+        removed = db.price_history.enforce_retention()
+        if removed:
+            logger.info(f"Removed {removed} expired price history buckets")
+    except Exception as e:
+        logger.error(f"Error enforcing price history retention: {str(e)}")
+
+def run_cycle(db, kol_tracker, token_analyzer, scheduler):
+    """Run one watchlist pass followed by the due performance updates."""
+    update_watchlist(db, kol_tracker)
+    poll_calls(scheduler, token_analyzer)
+
+def run(worker_id=None, sharded=False):
+    """Main monitoring loop, optionally limited to this worker's KOL partitions."""
     # Initialize components
     db = Database()
     kol_tracker = KOLTracker(db)
     token_analyzer = TokenAnalyzer()
+    leases = None
+    if sharded:
+        db.assign_kol_partitions()
+        leases = LeaseManager(db, worker_id).start()
+    owns_kol = leases.owns_kol if leases else None
+    scheduler = PollScheduler(db, owns_kol)
+    next_watchlist_update = 0
+    next_retention = 0
+    generation = leases.generation if leases else 0
 
     while True:
         try:
-            # Update KOL watchlist
-            logger.info("Updating KOL watchlist...")
-            top_kols = db.get_top_kols()
-            suspicious_kols = db.get_suspicious_kols()
-
-            # Generate reports
-            logger.info("Generating KOL reports...")
-            for kol in top_kols:
-                report = kol_tracker.get_kol_report(kol['_id'])
-                logger.info(f"Top KOL {report['twitter_handle']}: Trust Score {report['trust_score']}")
-
-            for kol in suspicious_kols:
-                report = kol_tracker.get_kol_report(kol['_id'])
-                logger.info(f"Suspicious KOL {report['twitter_handle']}: Trust Score {report['trust_score']}")
-
-            # Monitor new token calls
-            logger.info("Monitoring for new token calls...")
-            for kol in top_kols + suspicious_kols:
-                try:
-                    new_calls = kol_tracker.check_new_calls(kol['_id'])
-                    for call in new_calls:
-                        kol_tracker.analyze_token_call(kol['_id'], call['contract_address'])
-                except Exception as e:
-                    logger.error(f"Error processing KOL {kol['twitter_handle']}: {str(e)}")
+            if leases and leases.generation != generation:
+                # Partitions moved: reload calls and refresh the new KOLs now
+                generation = leases.generation
+                scheduler.reset()
+                next_watchlist_update = 0
+
+            if time.time() >= next_watchlist_update:
+                update_watchlist(db, kol_tracker, leases)
+                next_watchlist_update = time.time() + config.WATCH_LIST_UPDATE_INTERVAL
 
             # Update performance metrics
-            logger.info("Updating performance metrics...")
-            recent_calls = db.get_recent_calls(None, days=7)  # Get all recent calls
-            for call in recent_calls:
-                try:
-                    token_analyzer.update_performance(call['_id'])
-                except Exception as e:
-                    logger.error(f"Error updating performance for call {call['_id']}: {str(e)}")
-
-            # Sleep before next update
-            logger.info("Update cycle completed. Sleeping...")
-            time.sleep(config.WATCH_LIST_UPDATE_INTERVAL)
+            poll_calls(scheduler, token_analyzer)
+
+            # Retention is global, so only the owner of partition 0 runs it when sharded
+            if time.time() >= next_retention and (leases is None or leases.owns_partition(0)):
+                enforce_retention(db)
+                next_retention = time.time() + config.PRICE_HISTORY_RETENTION_INTERVAL
+
+            # Sleep until the next scheduled poll or watchlist update
+            wake = next_watchlist_update
+            next_due = scheduler.next_due()
+            if next_due is not None:
+                wake = min(wake, next_due.timestamp())
+            max_sleep = config.POLL_MAX_SLEEP
+            if leases:
+                max_sleep = min(max_sleep, config.SHARD_HEARTBEAT_INTERVAL)
+            time.sleep(min(max_sleep, max(1, wake - time.time())))
 
         except Exception as e:
             logger.error(f"Error in main loop: {str(e)}")
             time.sleep(60)  # Sleep for 1 minute before retrying
 
+def run_reactive():
+    """Monitoring loop driven by change streams on kols and token_calls.
+
+    New calls are scheduled as soon as they are written, new KOLs are
+    reported and checked at once, and KOLs are re-reported and checked
+    when their trust score crosses a recommendation band. While the
+    stream is idle, due calls are polled and, every
+    WATCH_LIST_UPDATE_INTERVAL, the watchlist pass checks Twitter for new
+    calls by existing KOLs; the calls it records arrive back through the
+    stream.
+    """
+    db = Database()
+    kol_tracker = KOLTracker(db)
+    token_analyzer = TokenAnalyzer()
+    scheduler = PollScheduler(db)
+    next_watchlist_update = [0]
+    next_retention = [0]
+
+    def on_new_call(call):
+        if call.get('status') == 'monitoring':
+            scheduler.add(call)
+
+    def on_new_kol(kol):
+        logger.info(f"New KOL {kol['twitter_handle']}: Trust Score {kol.get('trust_score')}")
+        check_kol_calls(kol_tracker, kol)
+
+    def on_trust_change(kol, previous, band):
+        report = kol_tracker.get_kol_report(kol['_id'])
+        logger.info(f"KOL {report['twitter_handle']} moved from {previous} to {band}: "
+                    f"Trust Score {report['trust_score']}")
+        check_kol_calls(kol_tracker, kol)
+
+    def on_idle():
+        try:
+            polled = scheduler.run_due(token_analyzer)
+            if polled:
+                logger.info(f"Updated performance for {polled} calls ({len(scheduler)} monitored)")
+        except Exception as e:
+            logger.error(f"Error updating performance: {str(e)}")
+        if time.time() >= next_watchlist_update[0]:
+            try:
+                update_watchlist(db, kol_tracker)
+            except Exception as e:
+                logger.error(f"Error updating watchlist: {str(e)}")
+            next_watchlist_update[0] = time.time() + config.WATCH_LIST_UPDATE_INTERVAL
+        if time.time() >= next_retention[0]:
+            enforce_retention(db)
+            next_retention[0] = time.time() + config.PRICE_HISTORY_RETENTION_INTERVAL
+
+    def on_resync():
+        # Events were missed: catch up with one full pass
+        scheduler.reset()
+        scheduler.sync()
+        update_watchlist(db, kol_tracker)
+        next_watchlist_update[0] = time.time() + config.WATCH_LIST_UPDATE_INTERVAL
+
+    processor = ChangeStreamProcessor(db, on_new_call, on_new_kol, on_trust_change,
+                                      on_idle, on_resync)
+    scheduler.sync()
+    processor.run()
+
+def run_worker(index):
+    """Entry point of a local sharded worker process."""
+    if config.METRICS_ENABLED:
+        # Each worker has its own registry, so each serves it on its own port
+        metrics.enable(port=config.METRICS_PORT + index)
+    run(sharded=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Unweighted KOL monitor")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Run this many sharded worker processes on this machine")
+    parser.add_argument('--worker-id', help="Run one sharded worker with this id")
+    parser.add_argument('--reactive', action='store_true',
+                        help="React to database change streams instead of periodic rescans "
+                             "(requires a replica set)")
+    args = parser.parse_args()
+
+    if config.METRICS_ENABLED and not args.workers:
+        metrics.enable()
+
+    if args.reactive:
+        run_reactive()
+    elif args.workers:
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(i,), daemon=True)
+            for i in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        run(args.worker_id, sharded=bool(args.worker_id))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,275 @@
+import asyncio
+import bisect
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return BUCKETS[-1]
+
+
+class Registry:
+    """Process-wide store of operation latencies, errors, in-flight gauges and cache counters."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.histograms = defaultdict(Histogram)
+        self.errors = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.cache = defaultdict(lambda: {'hit': 0, 'miss': 0})
+
+    def start(self, operation):
+        with self._lock:
+            self.in_flight[operation] += 1
+        return time.perf_counter()
+
+    def finish(self, operation, started, failed=False):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight[operation] -= 1
+            self.histograms[operation].observe(elapsed)
+            if failed:
+                self.errors[operation] += 1
+
+    def observe(self, operation, seconds, failed=False):
+        with self._lock:
+            self.histograms[operation].observe(seconds)
+            if failed:
+                self.errors[operation] += 1
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            self.cache[cache]['hit' if hit else 'miss'] += 1
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+            self.in_flight.clear()
+            self.cache.clear()
+
+
+REGISTRY = Registry(config.METRICS_ENABLED)
+
+
+@contextmanager
+def track(operation):
+    """Record latency, errors and in-flight count for the enclosed block."""
+    if not REGISTRY.enabled:
+        yield
+        return
+    started = REGISTRY.start(operation)
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        REGISTRY.finish(operation, started, failed)
+
+
+def timed(operation):
+    """Decorator form of track() for sync and async callables."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not REGISTRY.enabled:
+                    return await func(*args, **kwargs)
+                started = REGISTRY.start(operation)
+                failed = False
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    REGISTRY.finish(operation, started, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            started = REGISTRY.start(operation)
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                REGISTRY.finish(operation, started, failed)
+        return wrapper
+    return decorator
+
+
+def timed_iter(operation, iterable):
+    """Yield from a lazy iterable, recording the time spent fetching its items.
+
+    Cursors run their query while they are iterated, so timing the call
+    that creates one measures nothing. Only the time inside the iterator
+    counts, not the consumer's work between items; the total is recorded
+    once the iteration ends or is abandoned.
+    """
+    if not REGISTRY.enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    elapsed = 0.0
+    failed = False
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        REGISTRY.observe(operation, elapsed, failed)
+
+
+def instrument(client, prefix, methods):
+    """Wrap selected methods of a third-party client instance with timed()."""
+    for name in methods:
+        setattr(client, name, timed(f"{prefix}.{name}")(getattr(client, name)))
+    return client
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup as a hit or miss."""
+    if REGISTRY.enabled:
+        REGISTRY.record_cache(cache, hit)
+
+
+def render_prometheus(registry=REGISTRY):
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = ['# TYPE unweighted_operation_seconds histogram']
+    with registry._lock:
+        for operation, histogram in sorted(registry.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'unweighted_operation_seconds_bucket{{operation="{operation}",le="{le}"}} {cumulative}')
+            lines.append(f'unweighted_operation_seconds_sum{{operation="{operation}"}} {histogram.total}')
+            lines.append(f'unweighted_operation_seconds_count{{operation="{operation}"}} {histogram.count}')
+
+        lines.append('# TYPE unweighted_operation_errors_total counter')
+        for operation, count in sorted(registry.errors.items()):
+            lines.append(f'unweighted_operation_errors_total{{operation="{operation}"}} {count}')
+
+        lines.append('# TYPE unweighted_operation_in_flight gauge')
+        for operation, count in sorted(registry.in_flight.items()):
+            lines.append(f'unweighted_operation_in_flight{{operation="{operation}"}} {count}')
+
+        lines.append('# TYPE unweighted_cache_requests_total counter')
+        for cache, counts in sorted(registry.cache.items()):
+            for result, count in counts.items():
+                lines.append(f'unweighted_cache_requests_total{{cache="{cache}",result="{result}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def summary(registry=REGISTRY):
+    """One line per operation and cache, for periodic logging."""
+    lines = []
+    with registry._lock:
+        for operation, h in sorted(registry.histograms.items()):
+            lines.append(
+                f"{operation}: {h.count} calls, {registry.errors.get(operation, 0)} errors, "
+                f"avg {h.total / max(1, h.count) * 1000:.1f}ms, "
+                f"p95 <= {h.quantile(0.95) * 1000:.0f}ms, "
+                f"in flight {registry.in_flight.get(operation, 0)}"
+            )
+        for cache, counts in sorted(registry.cache.items()):
+            lookups = counts['hit'] + counts['miss']
+            lines.append(f"cache {cache}: {counts['hit'] / max(1, lookups):.1%} hit rate over {lookups} lookups")
+    return lines
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port=None, host='127.0.0.1'):
+    """Serve /metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, config.METRICS_PORT if port is None else port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_log_summary(interval=None):
+    """Log a metrics summary every `interval` seconds from a daemon thread."""
+    interval = interval or config.METRICS_LOG_INTERVAL
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            for line in summary():
+                logger.info(line)
+
+    threading.Thread(target=run, daemon=True).start()
+    return stop
+
+
+def enable(port=None, log_interval=None):
+    """Turn on collection and start the HTTP endpoint and log summary."""
+    REGISTRY.enabled = True
+    server = start_http_server(port)
+    stop = start_log_summary(log_interval)
+    return server, stop
@@ -3,12 +3,13 @@ import config
 import logging
 from typing import List, Dict
 import asyncio
+import metrics
 
 logger = logging.getLogger(__name__)
 
 class OpenAIAnalyzer:
     def __init__(self):
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL)
         self.system_prompt = """
         You are an AI analyst specializing in cryptocurrency and Solana token analysis. 
         Your task is to analyze Twitter content and token patterns to:
@@ -81,6 +82,7 @@ class OpenAIAnalyzer:
             logger.error(f"Error in KOL credibility evaluation: {str(e)}")
             return {"error": str(e)}
 
+    @metrics.timed('openai.completion')
     async def _get_completion(self, messages: List[Dict]) -> str:
         """Get completion from OpenAI API."""
         try:
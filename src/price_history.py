@@ -0,0 +1,251 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+import config
+import scoring
+
+# Timestamps are POSIX seconds; price and liquidity are aligned with them.
+PriceSeries = namedtuple('PriceSeries', ['timestamps', 'price', 'liquidity'])
+
+_FIELDS = ('ts', 'price', 'liquidity')
+
+
+def _empty_series():
+    empty = np.empty(0, dtype=np.float64)
+    return PriceSeries(empty, empty.copy(), empty.copy())
+
+
+def _pack(ts, price, liquidity):
+    return Binary(np.array([ts, price, liquidity], dtype='<f8').tobytes())
+
+
+def _unpack(bucket):
+    """Decode a bucket into a (3, n) float64 array, whether packed or still open."""
+    if bucket.get('data') is not None:
+        return np.frombuffer(bucket['data'], dtype='<f8').reshape(3, -1)
+    return np.array([bucket.get(field, []) for field in _FIELDS], dtype=np.float64)
+
+
+class PriceHistory:
+    """Bucketed price/liquidity time series for token calls.
+
+    Each bucket holds the samples of one call and tier that fall in a
+    fixed span of time (PRICE_HISTORY_BUCKET_SPANS, a day of raw samples).
+    Samples are appended to the open bucket of their span; when a call
+    moves on to a new span, its earlier buckets are sealed: their arrays
+    are packed into a single binary blob, so storage cost is a few bytes
+    per sample rather than one BSON element each. A settled call has its
+    last open buckets sealed by maintain(final=True). Coarser tiers are
+    filled by downsampling the raw tier and every tier has its own
+    retention.
+    """
+
+    def __init__(self, collection, bucket_spans=None, tiers=None):
+        self.collection = collection
+        self.bucket_spans = bucket_spans or config.PRICE_HISTORY_BUCKET_SPANS
+        self.tiers = tiers or config.PRICE_HISTORY_TIERS
+        self.collection.create_index(
+            [('call_id', ASCENDING), ('tier', ASCENDING), ('start', ASCENDING)]
+        )
+        self.collection.create_index([('tier', ASCENDING), ('end', ASCENDING)])
+
+    def _span_starts(self, ts, tier):
+        span = self.bucket_spans.get(tier, self.bucket_spans['raw'])
+        return np.floor(ts / span) * span
+
+    def append(self, call_id, timestamp, price, liquidity=np.nan, tier='raw'):
+        """Append one sample to the open bucket of its span."""
+        ts = timestamp.timestamp() if isinstance(timestamp, datetime) else float(timestamp)
+        self._push(call_id, tier, np.array([ts]), np.array([float(price)]),
+                   np.array([float(liquidity)]))
+
+    def append_many(self, call_id, timestamps, prices, liquidity=None, tier='raw'):
+        """Append a batch of samples, writing spans before the newest directly as packed blobs."""
+        ts = np.asarray(timestamps, dtype=np.float64)
+        price = np.asarray(prices, dtype=np.float64)
+        liq = (np.full(ts.shape, np.nan) if liquidity is None
+               else np.asarray(liquidity, dtype=np.float64))
+        if not len(ts):
+            return
+        spans = self._span_starts(ts, tier)
+        newest = spans.max()
+
+        docs = []
+        for span_start in np.unique(spans[spans < newest]):
+            chunk = spans == span_start
+            order = np.argsort(ts[chunk], kind='stable')
+            docs.append({
+                'call_id': call_id,
+                'tier': tier,
+                'sealed': True,
+                'bucket_start': datetime.fromtimestamp(span_start),
+                'count': int(chunk.sum()),
+                'start': datetime.fromtimestamp(ts[chunk].min()),
+                'end': datetime.fromtimestamp(ts[chunk].max()),
+                'data': _pack(ts[chunk][order], price[chunk][order], liq[chunk][order])
+            })
+        if docs:
+            self.collection.insert_many(docs, ordered=True)
+        chunk = spans == newest
+        self._push(call_id, tier, ts[chunk], price[chunk], liq[chunk])
+
+    def _push(self, call_id, tier, ts, price, liquidity):
+        bucket_start = datetime.fromtimestamp(self._span_starts(ts[0], tier))
+        previous = self.collection.find_one_and_update(
+            {'call_id': call_id, 'tier': tier, 'sealed': False, 'bucket_start': bucket_start},
+            {
+                '$push': {'ts': {'$each': ts.tolist()},
+                          'price': {'$each': price.tolist()},
+                          'liquidity': {'$each': liquidity.tolist()}},
+                '$inc': {'count': len(ts)},
+                '$min': {'start': datetime.fromtimestamp(ts.min())},
+                '$max': {'end': datetime.fromtimestamp(ts.max())}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            # The call has started a new span: earlier spans are complete
+            self.seal(call_id, tier, before=bucket_start)
+
+    def seal(self, call_id, tier=None, before=None):
+        """Pack the open buckets of a call, optionally only one tier's or those before a span."""
+        query = {'call_id': call_id, 'sealed': False}
+        if tier is not None:
+            query['tier'] = tier
+        if before is not None:
+            query['bucket_start'] = {'$lt': before}
+        sealed = 0
+        for bucket in self.collection.find(query):
+            self._seal(bucket)
+            sealed += 1
+        return sealed
+
+    def _seal(self, bucket):
+        data = _unpack(bucket)
+        order = np.argsort(data[0], kind='stable')
+        self.collection.update_one(
+            {'_id': bucket['_id'], 'sealed': False},
+            {
+                '$set': {'sealed': True, 'data': _pack(*data[:, order])},
+                '$unset': {field: '' for field in _FIELDS}
+            }
+        )
+
+    def read(self, call_id, start=None, end=None, tier='raw'):
+        """Return the samples of a call in [start, end] as NumPy arrays."""
+        query = {'call_id': call_id, 'tier': tier}
+        if end is not None:
+            query['start'] = {'$lte': end}
+        if start is not None:
+            query['end'] = {'$gte': start}
+
+        chunks = [_unpack(b) for b in self.collection.find(query).sort('start', ASCENDING)]
+        if not chunks:
+            return _empty_series()
+
+        data = np.concatenate(chunks, axis=1)
+        data = data[:, np.argsort(data[0], kind='stable')]
+        mask = np.ones(data.shape[1], dtype=bool)
+        if start is not None:
+            mask &= data[0] >= start.timestamp()
+        if end is not None:
+            mask &= data[0] <= end.timestamp()
+        data = data[:, mask]
+        return PriceSeries(data[0], data[1], data[2])
+
+    def lowest_prices(self, call_ids, tier=None, batch_size=1000):
+        """Lowest recorded price per call, read only from the buckets of those calls.
+
+        With no tier, every tier is searched, so calls whose raw samples have
+        expired still get a low from the downsampled tiers.
+        """
+        call_ids = list(call_ids)
+        lows = {}
+        for offset in range(0, len(call_ids), batch_size):
+            query = {'call_id': {'$in': call_ids[offset:offset + batch_size]}}
+            if tier is not None:
+                query['tier'] = tier
+            for bucket in self.collection.find(query, {'call_id': 1, 'data': 1, 'price': 1}):
+                if bucket.get('data') is not None:
+                    prices = np.frombuffer(bucket['data'], dtype='<f8').reshape(3, -1)[1]
+                else:
+                    prices = np.asarray(bucket.get('price', []), dtype=np.float64)
+                if prices.size and not np.isnan(prices).all():
+                    call_id = bucket['call_id']
+                    low = np.nanmin(prices)
+                    lows[call_id] = min(low, lows.get(call_id, low))
+        return lows
+
+    def roi_curve(self, call, start=None, end=None, tier='raw'):
+        """Return timestamps and ROI (%) of a call relative to its initial price."""
+        series = self.read(call['_id'], start, end, tier)
+        return series.timestamps, scoring.calculate_roi(call.get('initial_price', 0), series.price)
+
+    def downsample(self, call_id, source, target, interval, now=None, final=False):
+        """Roll complete `interval`-second bins from `source` into the `target` tier.
+
+        Each bin keeps its last price (close) and mean liquidity, stamped at
+        the bin start. Bins already present in the target tier are skipped.
+        With `final`, the call gets no more samples, so the trailing partial
+        bin is rolled up as well.
+        """
+        now = now or datetime.now()
+        latest = self.collection.find_one(
+            {'call_id': call_id, 'tier': target}, sort=[('end', DESCENDING)]
+        )
+        since = None
+        if latest:
+            since = latest['end'] + timedelta(seconds=interval)
+
+        series = self.read(call_id, start=since, tier=source)
+        if not len(series.timestamps):
+            return 0
+
+        bins = np.floor(series.timestamps / interval) * interval
+        complete = bins + interval <= now.timestamp()
+        if final:
+            complete[:] = True
+        if not complete.any():
+            return 0
+        bins, price, liquidity = bins[complete], series.price[complete], series.liquidity[complete]
+
+        starts, first = np.unique(bins, return_index=True)
+        last = np.append(first[1:], len(bins)) - 1
+        counts = np.diff(np.append(first, len(bins)))
+        liq_valid = ~np.isnan(liquidity)
+        liq_sum = np.add.reduceat(np.where(liq_valid, liquidity, 0), first)
+        liq_n = np.add.reduceat(liq_valid.astype(np.int64), first)
+        mean_liq = np.divide(liq_sum, liq_n, out=np.full(len(starts), np.nan), where=liq_n > 0)
+
+        self.append_many(call_id, starts, price[last], mean_liq, tier=target)
+        return int(counts.size)
+
+    def enforce_retention(self, now=None):
+        """Delete buckets that have aged out of their tier's retention window."""
+        now = now or datetime.now()
+        removed = 0
+        for tier, _, retention_days in self.tiers:
+            if retention_days is None:
+                continue
+            cutoff = now - timedelta(days=retention_days)
+            removed += self.collection.delete_many(
+                {'tier': tier, 'end': {'$lt': cutoff}}
+            ).deleted_count
+        return removed
+
+    def maintain(self, call_id, now=None, final=False):
+        """Downsample a call through every configured tier.
+
+        With `final`, the call is settled: every bin is rolled up and its
+        remaining open buckets are sealed.
+        """
+        previous = None
+        for tier, interval, _ in self.tiers:
+            if previous is not None and interval:
+                self.downsample(call_id, previous, tier, interval, now, final)
+            previous = tier
+        if final:
+            self.seal(call_id)
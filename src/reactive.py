@@ -0,0 +1,166 @@
+import logging
+import time
+from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+import config
+from kol_tracker import trust_recommendation
+
+logger = logging.getLogger(__name__)
+
+# Server error code for a resume token that has fallen off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Only the events handle() acts on: new calls, new or replaced KOLs and
+# updates that touch a KOL's trust score
+STREAM_PIPELINE = [
+    {'$match': {'$or': [
+        {'ns.coll': 'token_calls', 'operationType': 'insert'},
+        {'ns.coll': 'kols', 'operationType': {'$in': ['insert', 'replace']}},
+        {'ns.coll': 'kols', 'operationType': 'update',
+         'updateDescription.updatedFields.trust_score': {'$exists': True}},
+    ]}}
+]
+
+
+class ChangeStreamProcessor:
+    """Reacts to writes on `kols` and `token_calls` through a MongoDB change stream.
+
+    New calls, new KOLs and trust scores that cross a recommendation band
+    are dispatched to callbacks as they happen. The resume token is
+    persisted in `stream_state` after handled events and whenever the
+    stream goes idle, together with the trust band of every KOL as of
+    that token, so a restart continues where the last run stopped and
+    still notices band changes made while it was down.
+    Change streams need a replica set; a single-node one is enough.
+    """
+
+    def __init__(self, db, on_new_call=None, on_new_kol=None, on_trust_change=None,
+                 on_idle=None, on_resync=None, name='monitor'):
+        self.db = db
+        self.name = name
+        self.state = db.db.stream_state
+        self.on_new_call = on_new_call
+        self.on_new_kol = on_new_kol
+        self.on_trust_change = on_trust_change
+        self.on_idle = on_idle
+        self.on_resync = on_resync
+        self._bands = {}
+        self._bands_dirty = False
+        self._running = False
+        self._saved_token = None
+        self._saved_at = 0.0
+
+    def _load_state(self):
+        """Resume token and trust bands saved by the last run, loading current bands without a token."""
+        state = self.state.find_one({'_id': self.name}) or {}
+        token = state.get('resume_token')
+        if token is not None and state.get('bands') is not None:
+            self._bands = {kol_id: band for kol_id, band in state['bands']}
+            self._bands_dirty = False
+        else:
+            self._load_bands()
+        return token
+
+    def _save_token(self, token, force=False):
+        if token is None or token == self._saved_token:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at < config.REACTIVE_RESUME_SAVE_INTERVAL:
+            return
+        update = {'resume_token': token, 'updated_at': datetime.now()}
+        if self._bands_dirty:
+            update['bands'] = [[kol_id, band] for kol_id, band in self._bands.items()]
+        self.state.update_one({'_id': self.name}, {'$set': update}, upsert=True)
+        self._bands_dirty = False
+        self._saved_token = token
+        self._saved_at = now
+
+    def _load_bands(self):
+        self._bands = {
+            kol['_id']: trust_recommendation(kol.get('trust_score', 0))
+            for kol in self.db.kols.find({}, {'trust_score': 1})
+        }
+        self._bands_dirty = True
+
+    def handle(self, change):
+        """Dispatch one change event to the matching callback."""
+        collection = change['ns']['coll']
+        operation = change['operationType']
+        document = change.get('fullDocument')
+
+        if collection == 'token_calls':
+            if operation == 'insert' and self.on_new_call:
+                self.on_new_call(document)
+            return
+
+        kol_id = change['documentKey']['_id']
+        if operation == 'insert':
+            self._bands[kol_id] = trust_recommendation(document.get('trust_score', 0))
+            self._bands_dirty = True
+            if self.on_new_kol:
+                self.on_new_kol(document)
+            return
+
+        if operation == 'update':
+            updated = change.get('updateDescription', {}).get('updatedFields', {})
+            if 'trust_score' not in updated:
+                return
+            score = updated['trust_score']
+        else:
+            score = (document or {}).get('trust_score', 0)
+        band = trust_recommendation(score)
+        previous = self._bands.get(kol_id)
+        if previous != band:
+            self._bands[kol_id] = band
+            self._bands_dirty = True
+        if previous is not None and previous != band and self.on_trust_change:
+            self.on_trust_change(document or self.db.get_kol(kol_id), previous, band)
+
+    def run(self):
+        """Process changes until stop() is called, reconnecting on errors."""
+        self._running = True
+        token = self._load_state()
+        backoff = 1
+        while self._running:
+            try:
+                with self.db.db.watch(
+                    STREAM_PIPELINE,
+                    full_document='updateLookup',
+                    resume_after=token,
+                    max_await_time_ms=config.REACTIVE_MAX_AWAIT_MS
+                ) as stream:
+                    backoff = 1
+                    idle_at = time.monotonic()
+                    while self._running and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            try:
+                                self.handle(change)
+                            except Exception as e:
+                                logger.error(f"Error handling {change['operationType']} on "
+                                             f"{change['ns']['coll']}: {str(e)}")
+                        token = stream.resume_token
+                        self._save_token(token, force=change is None)
+                        # Also run the idle hook periodically under a steady flow of events
+                        if self.on_idle and (change is None or
+                                             time.monotonic() - idle_at >= config.REACTIVE_MAX_AWAIT_MS / 1000):
+                            self.on_idle()
+                            idle_at = time.monotonic()
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_HISTORY_LOST:
+                    raise
+                # The token is older than the oplog: rescan once, then follow from now
+                logger.warning(f"Resume token for {self.name} expired, resynchronising")
+                token = None
+                self.state.delete_one({'_id': self.name})
+                self._load_bands()
+                if self.on_resync:
+                    self.on_resync()
+            except PyMongoError as e:
+                logger.error(f"Change stream {self.name} failed: {str(e)}; retrying in {backoff}s")
+                time.sleep(backoff)
+                backoff = min(60, backoff * 2)
+        self._save_token(token, force=True)
+
+    def stop(self):
+        self._running = False
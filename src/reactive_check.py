@@ -0,0 +1,156 @@
+"""Checks that the change stream processor fires each callback exactly once across a crash.
+
+Needs a MongoDB replica set (a single-node one is enough), since
+mongomock has no change streams. The processor runs in a child process
+with callbacks that report to this one. The check inserts a KOL, inserts
+a call and moves an existing KOL across a trust band, then kills the
+processor once it has gone idle and saved its resume token. While it is
+down another call is inserted and another KOL changes band. A restarted
+processor has to deliver those from the saved token without replaying
+anything from before the kill. A write that touches no trust score must
+not reach the callbacks at all.
+"""
+import argparse
+import logging
+import multiprocessing
+import queue
+import time
+from collections import Counter
+from datetime import datetime
+import config
+import database
+from fake_services import FAKE_MINT
+from reactive import ChangeStreamProcessor
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'unweighted_reactive_check'
+STREAM_NAME = 'reactive_check'
+
+
+def _open_database(mongo_uri):
+    config.MONGODB_URI = mongo_uri
+    config.DB_NAME = DB_NAME
+    return database.Database()
+
+
+def _processor(mongo_uri, events):
+    db = _open_database(mongo_uri)
+    processor = ChangeStreamProcessor(
+        db,
+        on_new_call=lambda call: events.put(('new_call', str(call['_id']))),
+        on_new_kol=lambda kol: events.put(('new_kol', str(kol['_id']))),
+        on_trust_change=lambda kol, previous, band: events.put(
+            ('trust_change', str(kol['_id']), previous, band)),
+        on_idle=lambda: events.put(('idle',)),
+        name=STREAM_NAME
+    )
+    processor.run()
+
+
+class Harness:
+    """Starts and kills processor processes and collects what their callbacks report."""
+
+    def __init__(self, mongo_uri, timeout):
+        self.mongo_uri = mongo_uri
+        self.timeout = timeout
+        self.context = multiprocessing.get_context('spawn')
+        self.events = self.context.Queue()
+        self.received = []
+        self.process = None
+
+    def start(self):
+        self.process = self.context.Process(target=_processor, args=(self.mongo_uri, self.events))
+        self.process.start()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+    def wait(self, expected=(), idles=1):
+        """Collect events until every expected one has arrived, then `idles` idle ticks."""
+        deadline = time.monotonic() + self.timeout
+        idle = 0
+        while idle < idles or not all(event in self.received for event in expected):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                missing = [event for event in expected if event not in self.received]
+                raise SystemExit(f"Timed out waiting for {missing or 'the stream to go idle'}")
+            try:
+                event = self.events.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if event == ('idle',):
+                # Only count idle ticks once the expected events are in
+                if all(e in self.received for e in expected):
+                    idle += 1
+            else:
+                logger.info(f"callback {event}")
+                self.received.append(event)
+
+
+def _kol(db, handle, trust_score):
+    now = datetime.now()
+    return db.add_kol({'twitter_handle': handle, 'date_added': now, 'total_calls': 0,
+                       'successful_calls': 0, 'scam_calls': 0, 'trust_score': trust_score,
+                       'last_updated': now})
+
+
+def _call(db, kol_id):
+    return db.add_token_call({'kol_id': kol_id, 'contract_address': FAKE_MINT,
+                              'timestamp': datetime.now(), 'initial_price': 0.05,
+                              'initial_liquidity': 25000.0, 'risk_score': 0.3,
+                              'status': 'monitoring'})
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Check change stream delivery across a restart")
+    parser.add_argument('--mongo-uri', required=True,
+                        help="MongoDB replica set, e.g. a single-node one started with --replSet")
+    parser.add_argument('--timeout', type=float, default=30,
+                        help="Seconds to wait for each group of callbacks")
+    args = parser.parse_args()
+
+    db = _open_database(args.mongo_uri)
+    db.client.drop_database(DB_NAME)
+    db = _open_database(args.mongo_uri)
+    existing = _kol(db, 'check_existing', 90)
+
+    harness = Harness(args.mongo_uri, args.timeout)
+    harness.start()
+    # The first idle tick means the stream is open
+    harness.wait()
+
+    added = _kol(db, 'check_added', 100)
+    first_call = _call(db, existing)
+    db.update_kol_trust_score(existing, 30)
+    db.kols.update_one({'_id': added}, {'$set': {'total_calls': 1}})
+    expected = [('new_kol', str(added)), ('new_call', str(first_call)),
+                ('trust_change', str(existing), 'Trusted', 'Untrusted')]
+    # Idle ticks after the events mean the resume token has been saved
+    harness.wait(expected, idles=2)
+    harness.kill()
+    logger.info("Processor killed")
+
+    second_call = _call(db, added)
+    db.update_kol_trust_score(added, 50)
+    expected += [('new_call', str(second_call)), ('trust_change', str(added), 'Trusted', 'Caution')]
+
+    harness.start()
+    # Give a replay of the earlier events time to show up
+    harness.wait(expected, idles=3)
+    harness.kill()
+
+    counts = Counter(harness.received)
+    failures = [f"{event} fired {counts[event]} times" for event in expected if counts[event] != 1]
+    failures += [f"unexpected {event}" for event in counts if event not in expected]
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        raise SystemExit("Change stream check failed")
+    logger.info(f"All {len(expected)} callbacks fired exactly once across the restart")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import asyncio
+import functools
+import logging
+import time
+import httpx
+from solana.rpc.async_api import AsyncClient
+import config
+
+logger = logging.getLogger(__name__)
+
+THROTTLED = 'throttled'
+FAILED = 'failed'
+
+# Smoothing for latency and error-rate averages
+EWMA_ALPHA = 0.2
+# Seconds for an endpoint's error/throttle rate to halve without new failures
+PENALTY_HALF_LIFE = 30.0
+# Cooldown after a failure, doubled for each consecutive failure
+BASE_COOLDOWN = 0.5
+MAX_COOLDOWN = 30.0
+
+
+def classify_error(error):
+    """Return THROTTLED or FAILED for endpoint faults, None for request errors.
+
+    solana-py wraps transport errors in SolanaRpcException, so the cause
+    chain is searched for the underlying httpx error.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status == 429:
+                return THROTTLED
+            if status >= 500:
+                return FAILED
+            return None
+        if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+            return FAILED
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def _retry_after(error):
+    while error is not None:
+        if isinstance(error, httpx.HTTPStatusError):
+            try:
+                return float(error.response.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                return None
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class Endpoint:
+    """One RPC endpoint with its health statistics and AIMD concurrency window."""
+
+    def __init__(self, url, client, initial_limit, max_limit):
+        self.url = url
+        self.client = client
+        self.limit = float(initial_limit)
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.latency = None
+        self._error_rate = 0.0
+        self._throttle_rate = 0.0
+        self._penalty_updated = time.monotonic()
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def _decay(self, now):
+        factor = 0.5 ** ((now - self._penalty_updated) / PENALTY_HALF_LIFE)
+        self._error_rate *= factor
+        self._throttle_rate *= factor
+        self._penalty_updated = now
+
+    def available(self, now):
+        return now >= self.cooldown_until and self.in_flight < int(self.limit)
+
+    def score(self, now):
+        """Expected cost of sending the next request here; lower is better."""
+        self._decay(now)
+        latency = self.latency if self.latency is not None else 0.0
+        penalty = 1 + 4 * self._error_rate + 4 * self._throttle_rate
+        return (latency + 0.001) * penalty * (1 + self.in_flight / self.limit)
+
+    def record_success(self, latency, now):
+        self._decay(now)
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latency = latency if self.latency is None else (
+            EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency)
+        self._error_rate *= 1 - EWMA_ALPHA
+        self._throttle_rate *= 1 - EWMA_ALPHA
+        # Additive increase: roughly one extra slot per window of successes
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def record_failure(self, kind, now, retry_after=None):
+        self._decay(now)
+        self.requests += 1
+        self.consecutive_failures += 1
+        if kind == THROTTLED:
+            self.throttled += 1
+            self._throttle_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self._throttle_rate
+        else:
+            self.failures += 1
+            self._error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self._error_rate
+        # Multiplicative decrease
+        self.limit = max(1.0, self.limit / 2)
+        cooldown = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (self.consecutive_failures - 1))
+        self.cooldown_until = now + max(cooldown, retry_after or 0)
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'failures': self.failures,
+        }
+
+
+class RpcPool:
+    """Routes Solana RPC calls across several endpoints.
+
+    Each call goes to the available endpoint with the best latency and
+    error record. Endpoints that answer 429/5xx or fail to connect halve
+    their concurrency limit and cool down, and the call is retried on
+    another endpoint; successes grow the limit again. The pool exposes the
+    AsyncClient methods, so it can stand in for a single client.
+    """
+
+    def __init__(self, urls, client_factory=AsyncClient, initial_concurrency=None,
+                 max_concurrency=None, max_attempts=None):
+        if not urls:
+            raise ValueError("RpcPool needs at least one endpoint")
+        initial = initial_concurrency or config.RPC_POOL_INITIAL_CONCURRENCY
+        maximum = max_concurrency or config.RPC_POOL_MAX_CONCURRENCY
+        self.client_factory = client_factory
+        self.endpoints = [Endpoint(url, client_factory(url), initial, maximum) for url in urls]
+        self.max_attempts = max_attempts or config.RPC_POOL_MAX_ATTEMPTS
+        self._condition = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(self.endpoints[0].client, name, None)):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    async def _acquire(self, exclude):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            while True:
+                now = time.monotonic()
+                candidates = [e for e in self.endpoints if e.available(now)]
+                preferred = [e for e in candidates if e not in exclude] or candidates
+                if preferred:
+                    endpoint = min(preferred, key=lambda e: e.score(now))
+                    endpoint.in_flight += 1
+                    return endpoint
+                cooling = [e.cooldown_until - now for e in self.endpoints if e.cooldown_until > now]
+                try:
+                    await asyncio.wait_for(self._condition.wait(), min(cooling) if cooling else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, endpoint):
+        async with self._condition:
+            endpoint.in_flight -= 1
+            self._condition.notify_all()
+
+    async def call(self, method, *args, **kwargs):
+        """Call an AsyncClient method on the healthiest endpoint, failing over on endpoint errors."""
+        tried = set()
+        last_error = None
+        for _ in range(self.max_attempts):
+            endpoint = await self._acquire(tried)
+            started = time.monotonic()
+            try:
+                result = await getattr(endpoint.client, method)(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None:
+                    raise
+                endpoint.record_failure(kind, time.monotonic(), _retry_after(e))
+                logger.warning(f"RPC {method} {kind} on {endpoint.url}: {type(e).__name__} {str(e)}")
+                tried.add(endpoint)
+                last_error = e
+                continue
+            finally:
+                await self._release(endpoint)
+            endpoint.record_success(time.monotonic() - started, time.monotonic())
+            return result
+        raise last_error
+
+    async def reconnect(self):
+        """Open fresh clients for the running event loop, keeping each endpoint's health record.
+
+        The replaced clients are closed; one whose loop has already shut
+        down cannot be, and is left to the garbage collector.
+        """
+        for endpoint in self.endpoints:
+            previous, endpoint.client = endpoint.client, self.client_factory(endpoint.url)
+            endpoint.in_flight = 0
+            try:
+                await previous.close()
+            except Exception as e:
+                logger.debug(f"Could not close the previous client for {endpoint.url}: {str(e)}")
+        self._condition = None
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
@@ -0,0 +1,186 @@
+import asyncio
+import heapq
+import logging
+import math
+from datetime import datetime, timedelta
+import config
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_PROJECTION = {
+    'kol_id': 1,
+    'contract_address': 1,
+    'timestamp': 1,
+    'initial_price': 1,
+    'initial_liquidity': 1,
+}
+
+
+class PollScheduler:
+    """Priority queue of monitored token calls ordered by their next poll time.
+
+    Fresh calls are polled every POLL_MIN_INTERVAL seconds and the interval
+    doubles every POLL_INTERVAL_DOUBLING_HOURS of call age, up to
+    POLL_MAX_INTERVAL. Price moves between polls shrink the interval again,
+    so active tokens stay hot and dead ones fade out. Calls retire once they
+    are older than POLL_MAX_AGE_DAYS or have rugged.
+    """
+
+    def __init__(self, db, owns_kol=None):
+        self.db = db
+        # Optional predicate restricting the scheduler to a subset of KOLs
+        self.owns_kol = owns_kol
+        self._heap = []
+        self._calls = {}
+        self._due = {}
+        self._volatility = {}
+        self._last_price = {}
+        self._synced_at = None
+
+    def __len__(self):
+        return len(self._calls)
+
+    def reset(self):
+        """Forget every call; the next sync reloads all monitored calls."""
+        self._heap = []
+        for state in (self._calls, self._due, self._volatility, self._last_price):
+            state.clear()
+        self._synced_at = None
+
+    def interval(self, call, now):
+        """Seconds until the next poll of a call."""
+        age_hours = max(0.0, (now - call['timestamp']).total_seconds() / 3600)
+        interval = config.POLL_MIN_INTERVAL * 2 ** (age_hours / config.POLL_INTERVAL_DOUBLING_HOURS)
+        interval /= 1 + self._volatility.get(call['_id'], 0.0) / config.POLL_VOLATILITY_SCALE
+        return min(config.POLL_MAX_INTERVAL, max(config.POLL_MIN_INTERVAL, interval))
+
+    def _push(self, call_id, due):
+        self._due[call_id] = due
+        heapq.heappush(self._heap, (due, str(call_id), call_id))
+
+    def add(self, call, now=None):
+        """Start tracking a call; it is due immediately unless polled recently."""
+        now = now or datetime.now()
+        self._calls[call['_id']] = call
+        last = call.get('last_updated')
+        due = last + timedelta(seconds=self.interval(call, now)) if last else now
+        self._push(call['_id'], due)
+
+    def sync(self, now=None):
+        """Pick up calls that entered the monitoring state since the last sync.
+
+        Calls already past POLL_MAX_AGE_DAYS are settled without being polled.
+        """
+        now = now or datetime.now()
+        since = None
+        if self._synced_at is not None:
+            # Overlap the previous window in case of clock skew between writers
+            since = self._synced_at - timedelta(seconds=config.POLL_MIN_INTERVAL)
+        added = 0
+        for call in self.db.get_monitoring_calls(since, dict(SCHEDULE_PROJECTION, last_updated=1)):
+            if call['_id'] in self._calls:
+                continue
+            if self.owns_kol is not None and not self.owns_kol(call.get('kol_id')):
+                continue
+            if now - call['timestamp'] > timedelta(days=config.POLL_MAX_AGE_DAYS):
+                self.retire(call['_id'], 'expired')
+                continue
+            self.add(call, now)
+            added += 1
+        self._synced_at = now
+        return added
+
+    def next_due(self):
+        """Time of the earliest scheduled poll, or None when idle."""
+        while self._heap:
+            due, _, call_id = self._heap[0]
+            if self._due.get(call_id) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None, limit=None):
+        """Remove and return the calls whose poll time has come, earliest first."""
+        now = now or datetime.now()
+        due_calls = []
+        while self._heap and (limit is None or len(due_calls) < limit):
+            due, _, call_id = self._heap[0]
+            if self._due.get(call_id) != due:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            del self._due[call_id]
+            call = self._calls[call_id]
+            if self.owns_kol is not None and not self.owns_kol(call.get('kol_id')):
+                del self._calls[call_id]
+                continue
+            due_calls.append(call)
+        return due_calls
+
+    def _settlement(self, call, performance, now):
+        if now - call['timestamp'] > timedelta(days=config.POLL_MAX_AGE_DAYS):
+            return 'expired'
+        if performance.get('current_price') == 0:
+            # The token no longer trades
+            return 'rugged'
+        if (performance.get('roi', 0) <= config.RUG_ROI_THRESHOLD or
+                performance.get('liquidity_change', 0) <= config.RUG_LIQUIDITY_THRESHOLD):
+            return 'rugged'
+        return None
+
+    def record(self, call, performance, now=None):
+        """Store a poll result and either reschedule the call or retire it."""
+        now = now or datetime.now()
+        call_id = call['_id']
+        self.db.update_call_performance(call_id, performance)
+
+        price = performance.get('current_price', 0)
+        previous = self._last_price.get(call_id)
+        if previous and price:
+            move = abs(math.log(price / previous)) * 100
+            self._volatility[call_id] = 0.5 * move + 0.5 * self._volatility.get(call_id, move)
+        if price:
+            self._last_price[call_id] = price
+
+        outcome = self._settlement(call, performance, now)
+        if outcome:
+            self.retire(call_id, outcome)
+        else:
+            self._push(call_id, now + timedelta(seconds=self.interval(call, now)))
+
+    def retire(self, call_id, outcome):
+        self.db.settle_call(call_id, outcome)
+        try:
+            # The call is final: roll its samples into the coarser tiers
+            self.db.price_history.maintain(call_id, final=True)
+        except Exception as e:
+            logger.error(f"Error downsampling price history for call {call_id}: {str(e)}")
+        for state in (self._calls, self._due, self._volatility, self._last_price):
+            state.pop(call_id, None)
+        logger.info(f"Call {call_id} settled: {outcome}")
+
+    async def _poll(self, calls, token_analyzer):
+        semaphore = asyncio.Semaphore(config.POLL_CONCURRENCY)
+
+        async def poll(call):
+            async with semaphore:
+                return await token_analyzer.get_performance(call)
+
+        return await asyncio.gather(*(poll(call) for call in calls), return_exceptions=True)
+
+    def run_due(self, token_analyzer, now=None):
+        """Poll every due call and return how many were polled."""
+        now = now or datetime.now()
+        calls = self.pop_due(now, config.POLL_MAX_PER_CYCLE)
+        if not calls:
+            return 0
+        results = token_analyzer.run(self._poll(calls, token_analyzer))
+        for call, result in zip(calls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error updating performance for call {call['_id']}: {str(result)}")
+                self._push(call['_id'], now + timedelta(seconds=self.interval(call, now)))
+                continue
+            self.record(call, result, now)
+        return len(calls)
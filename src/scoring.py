@@ -0,0 +1,252 @@
+import argparse
+import itertools
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import config
+
+logger = logging.getLogger(__name__)
+
+# Thresholds mirrored from utils.calculate_trust_impact. Tiers are checked in
+# order and the first match wins, exactly like the scalar if/elif chain.
+DEFAULT_TRUST_RULES = {
+    'roi_gain_tiers': ((50, 5), (20, 3), (0, 1)),
+    'roi_loss_tiers': ((-50, -5), (-20, -3)),
+    'liquidity_drain_threshold': -50,
+    'liquidity_drain_penalty': -5,
+}
+
+BASE_TRUST_SCORE = 100
+
+CALL_PROJECTION = {
+    'kol_id': 1,
+    'initial_price': 1,
+    'risk_score': 1,
+    'performance': 1,
+}
+
+
+def calculate_roi(initial_prices, current_prices):
+    """Vectorized utils.calculate_roi: ROI percentage, 0 where the initial price is 0."""
+    initial = np.asarray(initial_prices, dtype=np.float64)
+    current = np.asarray(current_prices, dtype=np.float64)
+    roi = np.zeros(np.broadcast(initial, current).shape, dtype=np.float64)
+    np.divide(current - initial, initial, out=roi, where=initial != 0)
+    roi *= 100
+    return roi
+
+
+def calculate_trust_impact(roi, liquidity_change, rules=None):
+    """Vectorized utils.calculate_trust_impact over ROI and liquidity change arrays."""
+    rules = rules or DEFAULT_TRUST_RULES
+    roi = np.asarray(roi, dtype=np.float64)
+    liquidity_change = np.asarray(liquidity_change, dtype=np.float64)
+
+    gains = rules['roi_gain_tiers']
+    losses = rules['roi_loss_tiers']
+    impact = np.select([roi > t for t, _ in gains], [v for _, v in gains], 0)
+    impact = impact + np.select([roi < t for t, _ in losses], [v for _, v in losses], 0)
+    impact = impact + np.where(
+        liquidity_change < rules['liquidity_drain_threshold'],
+        rules['liquidity_drain_penalty'], 0
+    )
+    return impact.astype(np.int64)
+
+
+def calculate_risk_score(risk_factors, weights=None):
+    """Vectorized TokenAnalyzer._calculate_risk_score.
+
+    `risk_factors` is a boolean matrix with one column per weight, in the
+    order of `weights` (config.RISK_FACTOR_WEIGHTS by default).
+    """
+    weights = weights or config.RISK_FACTOR_WEIGHTS
+    factors = np.asarray(risk_factors, dtype=bool).reshape(-1, len(weights))
+    score = np.zeros(len(factors), dtype=np.float64)
+    for column, weight in enumerate(weights.values()):
+        score += np.where(factors[:, column], weight, 0.0)
+    return np.minimum(1.0, score)
+
+
+def success_rates(kol_ids, performance):
+    """Share of calls with positive performance per KOL, as a Series indexed by kol_id."""
+    frame = pd.DataFrame({
+        'kol_id': kol_ids,
+        'successful': np.asarray(performance, dtype=np.float64) > 0,
+    })
+    return frame.groupby('kol_id', sort=False)['successful'].mean()
+
+
+def calls_frame(calls):
+    """Load token call documents into a columnar DataFrame.
+
+    Missing performance fields default to 0, matching the `.get(..., 0)`
+    lookups in the scalar scoring functions.
+    """
+    kol_ids, initial, current, roi, liquidity, holders, risk = [], [], [], [], [], [], []
+    for call in calls:
+        performance = call.get('performance') or {}
+        kol_ids.append(call.get('kol_id'))
+        initial.append(call.get('initial_price', 0) or 0)
+        risk.append(call.get('risk_score', 0) or 0)
+        current.append(performance.get('current_price', np.nan))
+        roi.append(performance.get('roi', 0))
+        liquidity.append(performance.get('liquidity_change', 0))
+        holders.append(performance.get('holder_change', 0))
+
+    return pd.DataFrame({
+        'kol_id': pd.Series(kol_ids, dtype=object),
+        'initial_price': np.asarray(initial, dtype=np.float64),
+        'current_price': np.asarray(current, dtype=np.float64),
+        'roi': np.asarray(roi, dtype=np.float64),
+        'liquidity_change': np.asarray(liquidity, dtype=np.float64),
+        'holder_change': np.asarray(holders, dtype=np.float64),
+        'risk_score': np.asarray(risk, dtype=np.float64),
+    })
+
+
+def score_calls(frame, rules=None, scam_threshold=None, scam_penalty=None):
+    """Add trust impact and success columns to a calls frame in one pass.
+
+    Rows that carry a current price get their ROI recomputed from prices;
+    the rest keep the ROI stored with their performance data. Calls whose
+    risk score exceeds the scam threshold carry the scam penalty that
+    KOLTracker.analyze_token_call applied when they were recorded.
+    """
+    if scam_threshold is None:
+        scam_threshold = config.SCAM_DETECTION_THRESHOLD
+    if scam_penalty is None:
+        scam_penalty = config.SCAM_TRUST_PENALTY
+    frame = frame.copy()
+    has_price = ~np.isnan(frame['current_price'].to_numpy())
+    if has_price.any():
+        roi = frame['roi'].to_numpy().copy()
+        roi[has_price] = calculate_roi(
+            frame['initial_price'].to_numpy()[has_price],
+            frame['current_price'].to_numpy()[has_price]
+        )
+        frame['roi'] = roi
+    frame['trust_impact'] = calculate_trust_impact(
+        frame['roi'].to_numpy(), frame['liquidity_change'].to_numpy(), rules
+    ) + np.where(frame['risk_score'].to_numpy() > scam_threshold, scam_penalty, 0)
+    frame['successful'] = frame['roi'].to_numpy() > 0
+    return frame
+
+
+def score_kols(frame, rules=None, base_score=BASE_TRUST_SCORE):
+    """Aggregate scored calls into per-KOL trust scores and call statistics."""
+    scored = score_calls(frame, rules)
+    grouped = scored.groupby('kol_id', sort=False)
+    stats = pd.DataFrame({
+        'total_calls': grouped.size(),
+        'successful_calls': grouped['successful'].sum().astype(np.int64),
+        'trust_impact': grouped['trust_impact'].sum(),
+    })
+    stats['success_rate'] = stats['successful_calls'] / stats['total_calls']
+    stats['trust_score'] = np.clip(base_score + stats['trust_impact'], 0, 100)
+    return stats
+
+
+def recompute_trust_scores(db, rules=None, base_score=BASE_TRUST_SCORE):
+    """Recompute trust scores for every KOL from its full call history."""
+    frame = calls_frame(db.get_all_calls(CALL_PROJECTION))
+    if frame.empty:
+        return pd.DataFrame()
+    stats = score_kols(frame, rules, base_score)
+
+    now = datetime.now()
+    db.bulk_update_kol_stats({
+        kol_id: {
+            'trust_score': int(score),
+            'total_calls': int(total),
+            'successful_calls': int(successful),
+            'last_updated': now
+        }
+        for kol_id, score, total, successful in zip(
+            stats.index,
+            stats['trust_score'].to_numpy(),
+            stats['total_calls'].to_numpy(),
+            stats['successful_calls'].to_numpy()
+        )
+    })
+    return stats
+
+
+def _parity_samples(samples, seed):
+    rng = np.random.default_rng(seed)
+    # Every tier threshold, and values just either side of each
+    edges = np.array([-50, -20, 0, 20, 50], dtype=np.float64)
+    boundary = np.concatenate([edges, np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf)])
+    roi = np.concatenate([boundary, rng.uniform(-150, 150, samples)])
+    liquidity = np.concatenate([boundary, rng.uniform(-100, 100, samples)])
+    liquidity = rng.permutation(liquidity)
+    initial = np.concatenate([[0.0, 0.0, 1.0], rng.lognormal(-8, 3, samples)])
+    current = np.concatenate([[0.0, 1.0, 0.0], initial[3:] * rng.lognormal(0, 1, samples)])
+    return roi, liquidity, initial, current
+
+
+def check_parity(samples=20000, seed=0):
+    """Compare the vectorized functions with their scalar originals on random and boundary inputs.
+
+    Returns a list of mismatch descriptions; empty when every result is identical.
+    """
+    import utils
+    from token_analyzer import TokenAnalyzer
+
+    roi, liquidity, initial, current = _parity_samples(samples, seed)
+    failures = []
+
+    expected = np.array([utils.calculate_roi(i, c) for i, c in zip(initial, current)], dtype=np.float64)
+    mismatched = np.flatnonzero(calculate_roi(initial, current) != expected)
+    if len(mismatched):
+        failures.append(f"calculate_roi differs on {len(mismatched)} inputs, "
+                        f"first at initial={initial[mismatched[0]]!r} current={current[mismatched[0]]!r}")
+
+    expected = np.array([utils.calculate_trust_impact({'roi': r, 'liquidity_change': l})
+                         for r, l in zip(roi, liquidity)])
+    mismatched = np.flatnonzero(calculate_trust_impact(roi, liquidity) != expected)
+    if len(mismatched):
+        failures.append(f"calculate_trust_impact differs on {len(mismatched)} inputs, "
+                        f"first at roi={roi[mismatched[0]]!r} liquidity_change={liquidity[mismatched[0]]!r}")
+
+    names = list(config.RISK_FACTOR_WEIGHTS)
+    factors = np.array(list(itertools.product([False, True], repeat=len(names))))
+    expected = np.array([TokenAnalyzer._calculate_risk_score(None, dict(zip(names, row)))
+                         for row in factors.tolist()])
+    mismatched = np.flatnonzero(calculate_risk_score(factors) != expected)
+    if len(mismatched):
+        failures.append(f"calculate_risk_score differs for factors {factors[mismatched[0]].tolist()}")
+
+    kol_ids = np.random.default_rng(seed).integers(0, 50, len(roi))
+    rates = success_rates(kol_ids, roi)
+    for kol_id, rate in rates.items():
+        performance = roi[kol_ids == kol_id]
+        if rate != len([p for p in performance if p > 0]) / len(performance):
+            failures.append(f"success_rates differs for KOL {kol_id}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute every KOL's trust score from its call history")
+    parser.add_argument('--check-parity', action='store_true',
+                        help="Compare the vectorized scoring with the scalar functions instead")
+    parser.add_argument('--samples', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.check_parity:
+        failures = check_parity(args.samples)
+        for failure in failures:
+            logger.error(failure)
+        if failures:
+            raise SystemExit("Vectorized scoring does not match the scalar functions")
+        logger.info(f"Vectorized scoring matches the scalar functions on {args.samples} samples")
+        return
+
+    from database import Database
+    stats = recompute_trust_scores(Database())
+    logger.info(f"Recomputed trust scores for {len(stats)} KOLs")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,172 @@
+"""Checks that KOL partition leases give every KOL exactly one owner.
+
+Runs several LeaseManager workers against one database in lock-step
+heartbeat rounds: with --mongo-uri each worker is a separate process on
+a shared mongod, otherwise the workers are instances in this process on
+mongomock. Rounds run on a simulated clock that advances one heartbeat
+interval per round, so lease expiry needs no waiting. One worker joins
+late, one leaves gracefully and releases its leases, and one dies: it
+stops heartbeating but keeps reporting what it believes it owns, so its
+partitions can only move once the lease TTL runs out. After every round
+each worker reports the partitions it treats as its own; no KOL may ever
+have two owners, and once the workers have settled every KOL must have
+exactly one.
+"""
+import argparse
+import logging
+import multiprocessing
+from datetime import datetime, timedelta
+import config
+import database
+from sharding import LeaseManager, partition_of
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'unweighted_shard_check'
+
+
+def _open_database(mongo_uri):
+    config.DB_NAME = DB_NAME
+    if mongo_uri:
+        config.MONGODB_URI = mongo_uri
+        return database.Database()
+    import mongomock
+    real_client = database.MongoClient
+    database.MongoClient = mongomock.MongoClient
+    try:
+        return database.Database()
+    finally:
+        database.MongoClient = real_client
+
+
+def _schedule(args):
+    """Rounds in which the last worker joins, the first leaves and the second dies."""
+    return max(1, args.rounds // 4), args.rounds // 3, args.rounds // 2
+
+
+def _clock(args, round_number):
+    return args.start_time + timedelta(seconds=round_number * args.interval)
+
+
+def _step(leases, index, round_number, args):
+    """Run one worker's heartbeat round, unless it has not joined, has left or has died."""
+    join_round, leave_round, die_round = _schedule(args)
+    if index == args.workers - 1 and round_number < join_round:
+        return
+    if index == 0 and round_number >= leave_round:
+        if round_number == leave_round:
+            leases.stop()
+        return
+    if index == 1 and round_number >= die_round:
+        return
+    leases.heartbeat(_clock(args, round_number))
+
+
+def _worker(index, args, start, done, reports):
+    db = _open_database(args.mongo_uri)
+    leases = LeaseManager(db, f"check-{index}", args.partitions, args.ttl)
+    for round_number in range(args.rounds):
+        start.wait()
+        _step(leases, index, round_number, args)
+        # Judge ownership only once every worker has heartbeated this round
+        done.wait()
+        reports.put((round_number, index, leases.owned_partitions(_clock(args, round_number))))
+    leases.stop()
+
+
+def _run_processes(args):
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(args.workers)
+    done = context.Barrier(args.workers)
+    reports = context.Queue()
+    processes = [context.Process(target=_worker, args=(i, args, start, done, reports))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    rounds = [{} for _ in range(args.rounds)]
+    for _ in range(args.rounds * args.workers):
+        round_number, index, owned = reports.get(timeout=60 + args.ttl)
+        rounds[round_number][index] = owned
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            raise SystemExit(f"Worker process exited with {process.exitcode}")
+    return rounds
+
+
+def _run_in_process(args):
+    db = _open_database(None)
+    managers = [LeaseManager(db, f"check-{i}", args.partitions, args.ttl)
+                for i in range(args.workers)]
+    rounds = []
+    for round_number in range(args.rounds):
+        for i, leases in enumerate(managers):
+            _step(leases, i, round_number, args)
+        # Ownership is judged after the whole round, as the processes do
+        now = _clock(args, round_number)
+        rounds.append({i: leases.owned_partitions(now) for i, leases in enumerate(managers)})
+    for leases in managers:
+        leases.stop()
+    return rounds
+
+
+def check(rounds, args):
+    """Failures for each round: KOLs with two owners, and unowned KOLs at the end."""
+    kol_partitions = [partition_of(f"kol-{i}", args.partitions) for i in range(args.kols)]
+    failures = []
+    for round_number, reports in enumerate(rounds):
+        owners = {}
+        for index, owned in reports.items():
+            for partition in owned:
+                owners.setdefault(partition, []).append(index)
+        shared = {p: workers for p, workers in owners.items() if len(workers) > 1}
+        if shared:
+            failures.append(f"round {round_number}: partitions with several owners {shared}")
+        counts = [len(owners.get(p, ())) for p in kol_partitions]
+        logger.info(f"round {round_number}: "
+                    f"{sorted((i, len(o)) for i, o in reports.items())} partitions per worker, "
+                    f"{counts.count(1)}/{args.kols} KOLs with one owner")
+        if round_number >= args.rounds - args.settled_rounds and counts.count(1) != args.kols:
+            failures.append(f"round {round_number}: {args.kols - counts.count(1)} KOLs "
+                            f"without exactly one owner")
+    return failures
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Check KOL lease ownership across workers")
+    parser.add_argument('--mongo-uri', help="MongoDB shared by worker processes; "
+                                            "without it the workers run in-process on mongomock")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=16)
+    parser.add_argument('--settled-rounds', type=int, default=3,
+                        help="Final rounds in which every KOL must have one owner")
+    parser.add_argument('--partitions', type=int, default=config.SHARD_PARTITIONS)
+    parser.add_argument('--kols', type=int, default=1000)
+    parser.add_argument('--ttl', type=int, default=config.SHARD_LEASE_TTL)
+    parser.add_argument('--interval', type=int, default=config.SHARD_HEARTBEAT_INTERVAL,
+                        help="Simulated seconds between heartbeat rounds")
+    args = parser.parse_args()
+    if args.workers < 4:
+        parser.error("--workers must be at least 4 so workers remain after one leaves and one dies")
+    args.start_time = datetime.utcnow()
+
+    if args.mongo_uri:
+        db = _open_database(args.mongo_uri)
+        db.client.drop_database(DB_NAME)
+        db.client.close()
+        rounds = _run_processes(args)
+    else:
+        rounds = _run_in_process(args)
+
+    failures = check(rounds, args)
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        raise SystemExit("Lease ownership check failed")
+    logger.info("Every KOL had at most one owner, and exactly one once settled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import logging
+import os
+import socket
+import threading
+import zlib
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def partition_of(kol_id, partitions=None):
+    """Stable partition number for a KOL, the same in every process."""
+    return zlib.crc32(str(kol_id).encode()) % (partitions or config.SHARD_PARTITIONS)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """Claims a fair share of KOL partitions for one worker through Mongo leases.
+
+    Every worker heartbeats into `workers` and holds partitions in
+    `kol_leases`, one document per partition with an owner and an expiry.
+    Leases are claimed with a conditional update, so at most one worker
+    owns a partition at a time. On every heartbeat a worker renews what it
+    holds, releases partitions above its fair share and claims free or
+    expired ones below it, so partitions move when workers join or die.
+    A worker only treats a partition as its own while its local copy of
+    the lease has not expired. Lease times are naive UTC, so workers on
+    hosts in different time zones compare them correctly.
+    """
+
+    def __init__(self, db, worker_id=None, partitions=None, ttl=None):
+        self.worker_id = worker_id or default_worker_id()
+        self.partitions = partitions or config.SHARD_PARTITIONS
+        self.ttl = timedelta(seconds=ttl or config.SHARD_LEASE_TTL)
+        # Stop using a lease a little before it expires to absorb clock skew
+        self.margin = self.ttl / 6
+        self.workers = db.db.workers
+        self.leases = db.db.kol_leases
+        self.generation = 0
+        self._owned = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.workers.create_index([('expires_at', ASCENDING)])
+        self.leases.create_index([('owner', ASCENDING)])
+        for partition in range(self.partitions):
+            try:
+                self.leases.update_one(
+                    {'_id': partition},
+                    {'$setOnInsert': {'owner': None, 'expires_at': datetime.min}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                pass
+
+    def heartbeat(self, now=None):
+        """Advertise this worker, renew held leases and rebalance."""
+        now = now or datetime.utcnow()
+        expires = now + self.ttl
+        self.workers.update_one(
+            {'_id': self.worker_id},
+            {'$set': {'heartbeat_at': now, 'expires_at': expires}},
+            upsert=True
+        )
+        self.leases.update_many(
+            {'owner': self.worker_id, 'expires_at': {'$gte': now}},
+            {'$set': {'expires_at': expires}}
+        )
+        held = {lease['_id']: lease['expires_at'] for lease in self.leases.find(
+            {'owner': self.worker_id, 'expires_at': {'$gte': now}}
+        )}
+        held = self._rebalance(held, now, expires)
+        with self._lock:
+            if set(held) != set(self._owned):
+                self.generation += 1
+                logger.info(f"Worker {self.worker_id} now owns {len(held)} partitions")
+            self._owned = held
+
+    def _fair_share(self, now):
+        live = sorted(w['_id'] for w in self.workers.find({'expires_at': {'$gte': now}}))
+        if self.worker_id not in live:
+            live = sorted(live + [self.worker_id])
+        share, extra = divmod(self.partitions, len(live))
+        return share + (1 if live.index(self.worker_id) < extra else 0)
+
+    def _rebalance(self, held, now, expires):
+        target = self._fair_share(now)
+
+        # Release the surplus so workers below their share can claim it
+        for partition in sorted(held)[target:]:
+            self.leases.update_one(
+                {'_id': partition, 'owner': self.worker_id},
+                {'$set': {'owner': None, 'expires_at': datetime.min}}
+            )
+            del held[partition]
+
+        if len(held) < target:
+            free = self.leases.find(
+                {'$or': [{'owner': None}, {'expires_at': {'$lt': now}}]}, {'_id': 1}
+            )
+            for lease in free:
+                if len(held) >= target:
+                    break
+                claimed = self.leases.find_one_and_update(
+                    {'_id': lease['_id'],
+                     '$or': [{'owner': None}, {'expires_at': {'$lt': now}}]},
+                    {'$set': {'owner': self.worker_id, 'expires_at': expires}}
+                )
+                if claimed is not None:
+                    held[lease['_id']] = expires
+        return held
+
+    def owns_partition(self, partition, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            expires = self._owned.get(partition)
+        return expires is not None and expires - self.margin > now
+
+    def owned_partitions(self, now=None):
+        """Partitions this worker currently treats as its own."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            owned = list(self._owned.items())
+        return sorted(partition for partition, expires in owned if expires - self.margin > now)
+
+    def owns_kol(self, kol_id):
+        return self.owns_partition(partition_of(kol_id, self.partitions))
+
+    def start(self):
+        """Heartbeat from a background thread until stop() is called."""
+        self.heartbeat()
+
+        def run():
+            while not self._stop.wait(config.SHARD_HEARTBEAT_INTERVAL):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logger.error(f"Heartbeat failed for worker {self.worker_id}: {str(e)}")
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Release every lease and deregister, letting other workers take over at once."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            self._owned = {}
+            self.generation += 1
+        self.leases.update_many(
+            {'owner': self.worker_id},
+            {'$set': {'owner': None, 'expires_at': datetime.min}}
+        )
+        self.workers.delete_one({'_id': self.worker_id})
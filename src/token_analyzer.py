@@ -1,4 +1,5 @@
 import asyncio
+import logging
 from solana.rpc.async_api import AsyncClient
 import requests
 from datetime import datetime, timedelta
@@ -6,15 +7,44 @@ import config
 from solders.pubkey import Pubkey
 import base58
 import aiohttp
+import metrics
+from utils import calculate_roi
 #continue
+logger = logging.getLogger(__name__)
+
+SOLANA_RPC_METHODS = ('get_account_info', 'get_signatures_for_address',
+                      'get_token_largest_accounts', 'get_token_supply')
+
 class TokenAnalyzer:
     def __init__(self):
         self.client = None
+        self._client_loop = None
+        self._loop = None
         self.jupiter_api = config.JUPITER_API_URL
 
+    def run(self, coroutine):
+        """Run a coroutine from synchronous code on the analyzer's own event loop.
+
+        Reusing one loop keeps the RPC connections open between calls
+        instead of reconnecting for every asyncio.run.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
     async def get_client(self):
+        # The client's connections belong to the event loop that opened them,
+        # so reconnect when called from a different loop than the last call
+        loop = asyncio.get_running_loop()
+        if self.client and self._client_loop is not loop:
+            await self.client.reconnect()
+            self._client_loop = loop
+        metrics.record_cache('solana_client', self.client is not None)
         if not self.client:
-            self.client = await config.get_solana_client()
+            self.client = metrics.instrument(
+                await config.get_solana_client(), 'solana', SOLANA_RPC_METHODS
+            )
+            self._client_loop = loop
         return self.client
 
     async def analyze_token(self, mint_address):
@@ -52,7 +82,7 @@ class TokenAnalyzer:
                 'timestamp': datetime.now()
             }
         except Exception as e:
-            print(f"Error analyzing token {mint_address}: {str(e)}")
+            logger.error(f"Error analyzing token {mint_address}: {str(e)}")
             return None
 
     async def _get_token_info(self, mint_address):
@@ -77,10 +107,11 @@ class TokenAnalyzer:
     async def _check_liquidity(self, mint_address):
         """Check token liquidity across major Solana DEXs."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.jupiter_api}/price?ids={str(mint_address)}") as response:
-                    data = await response.json()
-                    return float(data.get('data', {}).get(str(mint_address), {}).get('liquidityUsd', 0))
+            with metrics.track('jupiter.price'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{self.jupiter_api}/price?ids={str(mint_address)}") as response:
+                        data = await response.json()
+            return float(data.get('data', {}).get(str(mint_address), {}).get('liquidityUsd', 0))
         except:
             return 0
 
@@ -88,21 +119,25 @@ class TokenAnalyzer:
         """Analyze token holder distribution."""
         client = await self.get_client()
         
-        # Get token accounts
-        response = await client.get_token_accounts_by_owner(mint_address)
+        # The RPC returns at most the 20 largest accounts of a mint, which is
+        # enough to measure concentration without scanning every token account
+        largest, supply = await asyncio.gather(
+            client.get_token_largest_accounts(mint_address),
+            client.get_token_supply(mint_address)
+        )
         
-        if not response.value:
-            return {'holder_count': 0, 'concentration_risk': True}
+        if not largest.value:
+            return {'holder_count': 0, 'top_holder_share': 1.0, 'concentration_risk': True}
             
-        holders = response.value
-        holder_count = len(holders)
-        
-        # Calculate concentration (simplified)
-        concentration_risk = holder_count < 100
+        amounts = sorted((int(account.amount.amount) for account in largest.value), reverse=True)
+        total = int(supply.value.amount)
+        top_holder_share = sum(amounts[:config.TOP_HOLDERS]) / total if total else 1.0
         
         return {
-            'holder_count': holder_count,
-            'concentration_risk': concentration_risk
+            # Non-empty accounts among the largest, so capped at 20
+            'holder_count': len([amount for amount in amounts if amount > 0]),
+            'top_holder_share': top_holder_share,
+            'concentration_risk': top_holder_share > config.HOLDER_CONCENTRATION_THRESHOLD
         }
 
     async def _check_suspicious_activity(self, mint_address):
@@ -120,25 +155,54 @@ class TokenAnalyzer:
         # - Suspicious wallet interactions
         return False  # Placeholder
 
+    async def get_performance(self, call):
+        """Get current price and liquidity of a called token relative to the call."""
+        mint_address = call['contract_address']
+        price_data = await self._get_price_data(mint_address)
+        if price_data is None:
+            raise ValueError(f"Price request failed for {mint_address}")
+        # Jupiter drops rugged and delisted tokens, so no entry means no price
+        price = float(price_data.get('price') or 0)
+        liquidity = float(price_data.get('liquidityUsd') or 0)
+        return {
+            'current_price': price,
+            'liquidity': liquidity,
+            'roi': calculate_roi(call.get('initial_price', 0), price),
+            'liquidity_change': calculate_roi(call.get('initial_liquidity', 0), liquidity),
+            'timestamp': datetime.now()
+        }
+
+    async def _get_price_data(self, mint_address):
+        """Get the Jupiter price entry (price and liquidity) for a token.
+
+        Returns an empty dict when Jupiter has no entry for the token and
+        None when the request fails.
+        """
+        try:
+            with metrics.track('jupiter.price'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{self.jupiter_api}/price?ids={str(mint_address)}") as response:
+                        response.raise_for_status()
+                        data = await response.json()
+            return (data.get('data') or {}).get(str(mint_address)) or {}
+        except:
+            return None
+
     async def _get_current_price(self, mint_address):
         """Get current token price in USD."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.jupiter_api}/price?ids={str(mint_address)}") as response:
-                    data = await response.json()
-                    return float(data.get('data', {}).get(str(mint_address), {}).get('price', 0))
+            with metrics.track('jupiter.price'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{self.jupiter_api}/price?ids={str(mint_address)}") as response:
+                        data = await response.json()
+            return float(data.get('data', {}).get(str(mint_address), {}).get('price', 0))
         except:
             return 0
 
     def _calculate_risk_score(self, risk_factors):
         """Calculate a risk score from 0 to 1 based on risk factors."""
         score = 0
-        if risk_factors['low_liquidity']:
-            score += 0.3
-        if risk_factors['high_concentration']:
-            score += 0.3
-        if risk_factors['suspicious_activity']:
-            score += 0.2
-        if risk_factors['new_token']:
-            score += 0.2
+        for factor, weight in config.RISK_FACTOR_WEIGHTS.items():
+            if risk_factors[factor]:
+                score += weight
         return min(1.0, score)
@@ -0,0 +1,186 @@
+import logging
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+from utils import extract_token_address
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = ('like_count', 'retweet_count', 'reply_count', 'quote_count')
+# Weights of likes, retweets and replies in a tweet's engagement
+ENGAGEMENT_WEIGHTS = np.array([1, 2, 3])
+
+TWEET_PROJECTION = {
+    'username': 1,
+    'created_at': 1,
+    'like_count': 1,
+    'retweet_count': 1,
+    'reply_count': 1,
+    'quote_count': 1,
+    'mints': 1,
+}
+
+
+def engagement(likes, retweets, replies):
+    """Weighted engagement of one or many tweets."""
+    return (np.asarray(likes) * ENGAGEMENT_WEIGHTS[0] +
+            np.asarray(retweets) * ENGAGEMENT_WEIGHTS[1] +
+            np.asarray(replies) * ENGAGEMENT_WEIGHTS[2])
+
+
+def _utc(timestamp):
+    # Mongo stores naive UTC; tweepy returns aware datetimes
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def influence_score(followers, avg_engagement, tweet_count):
+    """Influence score of one or many users, capped at 100."""
+    score = (np.asarray(followers) * 0.4 +
+             np.asarray(avg_engagement) * 0.4 +
+             np.asarray(tweet_count) * 0.2) / 1000
+    return np.minimum(100, score)
+
+
+class TweetArchive:
+    """Local archive of fetched tweets for offline engagement analytics.
+
+    Tweets are stored one document each in `tweets`, keyed by tweet id,
+    with flat engagement counts and the mints they mention; re-fetching
+    a tweet refreshes its counts. The latest public metrics of each user
+    are kept in `twitter_users`. Analytics load the needed columns into a
+    DataFrame and compute features for any number of users at once, so
+    months of a KOL's history can be examined without touching the API.
+    """
+
+    def __init__(self, db):
+        self.tweets = db.tweets
+        self.users = db.twitter_users
+        self.tweets.create_index([('username', ASCENDING), ('created_at', ASCENDING)])
+        self.tweets.create_index([('mints', ASCENDING)])
+
+    def store(self, username, user_id, tweets):
+        """Archive tweets fetched for a user; returns how many were written."""
+        now = datetime.utcnow()
+        operations = []
+        for tweet in tweets:
+            metrics = tweet.public_metrics or {}
+            operations.append(UpdateOne(
+                {'_id': tweet.id},
+                {
+                    '$set': dict({field: metrics.get(field, 0) for field in METRIC_FIELDS},
+                                 fetched_at=now),
+                    '$setOnInsert': {
+                        'user_id': user_id,
+                        'username': username.lower(),
+                        'created_at': _utc(tweet.created_at),
+                        'text': tweet.text,
+                        'mints': sorted(set(extract_token_address(tweet.text))),
+                    }
+                },
+                upsert=True
+            ))
+        if not operations:
+            return 0
+        result = self.tweets.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def store_user(self, username, public_metrics):
+        """Keep the latest follower and tweet counts of a user."""
+        self.users.update_one(
+            {'_id': username.lower()},
+            {'$set': {
+                'followers_count': public_metrics.get('followers_count', 0),
+                'following_count': public_metrics.get('following_count', 0),
+                'tweet_count': public_metrics.get('tweet_count', 0),
+                'updated_at': datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    def frame(self, usernames=None, since=None, until=None):
+        """Archived tweets as a DataFrame sorted by user and time."""
+        query = {}
+        if usernames is not None:
+            if isinstance(usernames, str):
+                usernames = [usernames]
+            query['username'] = {'$in': [u.lower() for u in usernames]}
+        if since is not None or until is not None:
+            query['created_at'] = {}
+            if since is not None:
+                query['created_at']['$gte'] = _utc(since)
+            if until is not None:
+                query['created_at']['$lt'] = _utc(until)
+
+        columns = {name: [] for name in ('username', 'created_at') + METRIC_FIELDS + ('mint_count',)}
+        for tweet in self.tweets.find(query, TWEET_PROJECTION):
+            columns['username'].append(tweet['username'])
+            columns['created_at'].append(tweet['created_at'])
+            for field in METRIC_FIELDS:
+                columns[field].append(tweet.get(field, 0))
+            columns['mint_count'].append(len(tweet.get('mints', ())))
+
+        frame = pd.DataFrame({
+            'username': pd.Series(columns['username'], dtype=object),
+            'created_at': pd.to_datetime(pd.Series(columns['created_at'], dtype='datetime64[ns]')),
+            **{field: np.asarray(columns[field], dtype=np.int64) for field in METRIC_FIELDS},
+            'mint_count': np.asarray(columns['mint_count'], dtype=np.int64),
+        })
+        frame['engagement'] = engagement(frame['like_count'], frame['retweet_count'],
+                                         frame['reply_count'])
+        return frame.sort_values(['username', 'created_at'], kind='stable', ignore_index=True)
+
+    def features(self, usernames=None, since=None, until=None):
+        """Engagement, cadence and influence features per user.
+
+        Columns: tweets, avg_engagement, max_engagement, tweets_per_day,
+        median_gap_hours, gap_cv (spread of gaps between tweets; higher is
+        burstier), mint_share (fraction of tweets naming a mint),
+        followers_count, tweet_count and influence_score.
+        """
+        frame = self.frame(usernames, since, until)
+        gaps = frame.groupby('username')['created_at'].diff().dt.total_seconds() / 3600
+        frame['gap_hours'] = gaps
+        frame['mentions_mint'] = frame['mint_count'] > 0
+
+        grouped = frame.groupby('username')
+        features = grouped.agg(
+            tweets=('engagement', 'size'),
+            avg_engagement=('engagement', 'mean'),
+            max_engagement=('engagement', 'max'),
+            first=('created_at', 'min'),
+            last=('created_at', 'max'),
+            median_gap_hours=('gap_hours', 'median'),
+            gap_mean=('gap_hours', 'mean'),
+            gap_std=('gap_hours', 'std'),
+            mint_share=('mentions_mint', 'mean'),
+        )
+        span_days = (features['last'] - features['first']).dt.total_seconds() / 86400
+        features['tweets_per_day'] = features['tweets'] / np.maximum(span_days, 1)
+        features['gap_cv'] = (features['gap_std'] / features['gap_mean']).fillna(0)
+
+        users = pd.DataFrame(
+            list(self.users.find({'_id': {'$in': list(features.index)}})),
+            columns=['_id', 'followers_count', 'tweet_count']
+        ).set_index('_id')
+        features = features.join(users)
+        features[['followers_count', 'tweet_count']] = (
+            features[['followers_count', 'tweet_count']].fillna(0))
+        features['influence_score'] = influence_score(
+            features['followers_count'], features['avg_engagement'], features['tweet_count'])
+        return features.drop(columns=['first', 'last', 'gap_mean', 'gap_std'])
+
+    def avg_engagement(self, username, since=None, until=None):
+        """Average engagement of a user's archived tweets, 0 when there are none."""
+        frame = self.frame(username, since, until)
+        return float(frame['engagement'].mean()) if len(frame) else 0
+
+    def engagement_rate(self, username, followers, since=None, until=None):
+        """Average engagement as a percentage of followers."""
+        return self.avg_engagement(username, since, until) / max(1, followers) * 100
+
+    def mint_mentions(self, mint):
+        """Archived tweets that name a mint, oldest first."""
+        return list(self.tweets.find({'mints': mint}, TWEET_PROJECTION).sort('created_at', ASCENDING))
@@ -4,11 +4,13 @@ from datetime import datetime, timedelta
 from utils import extract_token_address
 import asyncio
 import logging
+import metrics
+from tweet_archive import influence_score
 
 logger = logging.getLogger(__name__)
 
 class TwitterHandler:
-    def __init__(self):
+    def __init__(self, archive=None):
         self.client = tweepy.Client(
             bearer_token=config.TWITTER_BEARER_TOKEN,
             consumer_key=config.TWITTER_API_KEY,
@@ -17,6 +19,9 @@ class TwitterHandler:
             access_token_secret=config.TWITTER_ACCESS_SECRET,
             wait_on_rate_limit=True
         )
+        metrics.instrument(self.client, 'twitter', ('get_user', 'get_users_tweets', 'create_tweet'))
+        # Optional TweetArchive that keeps every fetched tweet for offline analysis
+        self.archive = archive
         self.tracked_keywords = [
             'solana', 'SOL', '$SOL', 'SPL', 'token', 'mint', 'presale',
             'NFT', 'airdrop', 'dex', 'listing', 'launch'
@@ -45,6 +50,12 @@ class TwitterHandler:
             if not tweets.data:
                 return []
 
+            if self.archive is not None:
+                try:
+                    self.archive.store(username, user_id, tweets.data)
+                except Exception as e:
+                    logger.error(f"Error archiving tweets for {username}: {str(e)}")
+
             return self._process_tweets(tweets.data)
         except Exception as e:
             logger.error(f"Error fetching tweets for {username}: {str(e)}")
@@ -107,6 +118,8 @@ class TwitterHandler:
                 return 0
 
             metrics = user.data.public_metrics
+            if self.archive is not None:
+                self.archive.store_user(username, metrics)
             
             # Basic influence score calculation
             followers = metrics['followers_count']
@@ -117,15 +130,8 @@ class TwitterHandler:
             recent_tweets = await self.get_user_tweets(username, limit=20, days_back=30)
             avg_engagement = self._calculate_avg_engagement(recent_tweets)
             
-            # Calculate score (simplified version)
-            score = (
-                (followers * 0.4) +
-                (avg_engagement * 0.4) +
-                (tweets * 0.2)
-            ) / 1000  # Normalize
-            
-            # Cap at 100
-            return min(100, score)
+            # Same formula as the archive's per-user features, capped at 100
+            return float(influence_score(followers, avg_engagement, tweets))
         except Exception as e:
             logger.error(f"Error calculating influence score for {username}: {str(e)}")
             return 0
@@ -147,6 +153,29 @@ class TwitterHandler:
             
         return total_engagement / len(tweets)
 
+    async def get_user_metrics(self, username):
+        """Get account age and engagement rate for a user."""
+        user = self.client.get_user(
+            username=username,
+            user_fields=['created_at', 'public_metrics']
+        )
+        if not user.data:
+            return {'account_age_days': 0, 'engagement_rate': 0}
+
+        if self.archive is not None:
+            self.archive.store_user(username, user.data.public_metrics)
+
+        recent_tweets = await self.get_user_tweets(username, limit=20, days_back=30)
+        followers = user.data.public_metrics['followers_count']
+        return {
+            'account_age_days': (datetime.utcnow() - user.data.created_at.replace(tzinfo=None)).days,
+            'engagement_rate': self._calculate_avg_engagement(recent_tweets) / max(1, followers) * 100
+        }
+
+    async def send_reply(self, tweet_id, message):
+        """Reply to a tweet."""
+        return self.client.create_tweet(text=message, in_reply_to_tweet_id=tweet_id)
+
     async def check_account_credibility(self, username):
         """Check the credibility of a Twitter account."""
         try: